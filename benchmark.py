@@ -0,0 +1,197 @@
+# Benchmarks list loading, index building, single search latency and batch throughput for the searcher of one list.
+# List subjects and customers are synthetic (see synthetic.py) unless a list file is given, so it runs without the
+# list files and customer exports, and gives the same numbers for the same arguments on the same machine.
+# With a list file, parse_s is the time of the generated parser alone, load_sanctions_s that of parsing and converting.
+# With --diagnostics, also compares the candidate lookups, checks that candidate pruning loses no matches (exits with an
+# error if it does) and times the Aho-Corasick entity scan.
+#
+#     $ python3 benchmark.py eu
+#     $ python3 benchmark.py ofac --persons 100000 --customers 100000 --output benchmark_ofac.json
+#     $ python3 benchmark.py un --list-file un/consolidated.xml --diagnostics
+
+import argparse
+import importlib
+import json
+import os
+import sys
+from timeit import default_timer as timer
+
+
+def time_call(function, *args, repeat=1, **kwargs):
+    """
+        Calls the function repeat times, returns (median time in seconds, result of the last call)
+    """
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = timer()
+        result = function(*args, **kwargs)
+        times.append(timer() - start)
+    times.sort()
+    return (times[len(times) // 2], result)
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(p / 100.0 * len(sorted_values)))]
+
+
+def import_list_modules(list_name):
+    # the searchers import their reader and shared modules as top level modules from their own directory
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), list_name))
+    import reader
+    import searcher
+    return (reader, searcher)
+
+
+PARSER_MODULES = {"eu": "eu_global", "un": "un_global", "ofac": "sdn"}
+
+
+def benchmark_parse(list_name, list_filename, repeat):
+    """
+        Times the generated parser alone, reading the list file into its object tree, without the reader's conversion
+    """
+    parser = importlib.import_module(PARSER_MODULES[list_name])
+    (time_use_s, tree) = time_call(parser.parse, list_filename, silence=True, repeat=repeat)
+    return time_use_s
+
+
+def benchmark_load(reader, list_name, list_filename, repeat):
+    if list_name == "ofac":
+        (time_use_s, loaded) = time_call(reader.load_sdn_sanctions, list_filename, repeat=repeat)
+        (id_to_name_persons, id_to_name_entities, entity_name_to_id_map) = loaded
+    else:
+        (time_use_s, loaded) = time_call(reader.load_sanctions, list_filename, repeat=repeat)
+        (id_to_name_persons, id_to_name_entities) = loaded
+    return (time_use_s, id_to_name_persons, id_to_name_entities)
+
+
+def build_indexes(searcher, id_to_name_persons, results, repeat):
+    (results["find_noise_words_s"], stop_words) = time_call(searcher.find_noise_words, id_to_name_persons, repeat=repeat)
+    (results["phonetic_bins_s"], bin_to_id) = time_call(searcher.compute_phonetic_bin_lookup_table, id_to_name_persons, stop_words,
+                                                        first_names=False, repeat=repeat)
+    (results["first_name_phonetic_bins_s"], first_name_bin_to_id) = time_call(searcher.compute_phonetic_bin_lookup_table, id_to_name_persons,
+                                                                              stop_words, first_names=True, repeat=repeat)
+    (results["stop_word_bins_s"], stop_bin_to_id) = time_call(searcher.compute_stop_word_lookup_table, id_to_name_persons, stop_words, repeat=repeat)
+    (results["exact_names_s"], name_to_id) = time_call(searcher.compute_exact_name_lookup_table, id_to_name_persons, repeat=repeat)
+    (results["birthdate_index_s"], birthdate_index) = time_call(searcher.dateindex.BirthdateIndex, id_to_name_persons, repeat=repeat)
+    (results["word_graph_s"], token_graph) = time_call(searcher.dawg.compute_dawg_lookup_table, id_to_name_persons, stop_words, repeat=repeat)
+    results["phonetic_bin_count"] = len(bin_to_id)
+    return {"bin_to_id": bin_to_id, "name_to_id": name_to_id, "stop_bin_to_id": stop_bin_to_id, "max_candidates": 200,
+            "first_name_bin_to_id": first_name_bin_to_id, "birthdate_index": birthdate_index, "token_graph": token_graph}
+
+
+def benchmark_search(searcher, id_to_name_persons, indexes, customers, results, similarity_threshold=90):
+    search_options = dict(indexes)
+    bin_to_id = search_options.pop("bin_to_id")
+    latencies = []
+    for (firstname, lastname, birthdate, gender, id) in customers:
+        start = timer()
+        searcher.search(firstname + " " + lastname, bin_to_id, id_to_name_persons, gender=gender, birthdate=birthdate,
+                        similarity_threshold=similarity_threshold, **search_options)
+        latencies.append(timer() - start)
+    latencies.sort()
+    for p in (50, 90, 99):
+        results["search_p{}_ms".format(p)] = 10 ** 3 * percentile(latencies, p)
+    results["search_max_ms"] = 10 ** 3 * latencies[-1] if latencies else 0.0
+
+
+def benchmark_batch(searcher, id_to_name_persons, indexes, customers, results, similarity_threshold=90):
+    search_options = dict(indexes)
+    bin_to_id = search_options.pop("bin_to_id")
+    query_cache = searcher.querycache.QueryCache()
+
+    def query_key(customer):
+        (firstname, lastname, birthdate, gender, id) = customer
+        return searcher.querycache.make_query_key(firstname + " " + lastname, gender, birthdate)
+
+    def search_customer(customer):
+        (firstname, lastname, birthdate, gender, id) = customer
+        return searcher.cached_search(query_cache, firstname + " " + lastname, bin_to_id, id_to_name_persons, gender=gender, birthdate=birthdate,
+                                      similarity_threshold=similarity_threshold, **search_options)
+
+    stats = searcher.screening.ScreeningStats()
+    start = timer()
+    for (customer, matches) in searcher.screening.screen_rows(customers, query_key, search_customer, stats=stats):
+        pass
+    time_use_s = timer() - start
+    results["batch_rows_per_s"] = stats.rows / time_use_s if time_use_s else 0.0
+    results["batch_matched_rows"] = stats.matched_rows
+
+
+def run_diagnostics(searcher, id_to_name_persons, id_to_name_entities, indexes, results):
+    """
+        The BK-tree against the phonetic bins, candidate pruning against the union of the bin candidates and the entity
+        scan. Returns the (query, list-entry) matches pruning lost.
+    """
+    import aho_corasick
+
+    search_options = dict(indexes)
+    bin_to_id = search_options.pop("bin_to_id")
+    max_candidates = search_options.pop("max_candidates")
+    stop_words_persons = searcher.find_noise_words(id_to_name_persons)
+    searcher.print_candidate_lookup_benchmark(id_to_name_persons, stop_words_persons, "person")
+    missed = searcher.check_candidate_pruning_recall(bin_to_id, id_to_name_persons, "person", max_candidates, stop_words=stop_words_persons,
+                                                     **search_options)
+    results["pruning_missed_matches"] = len(missed)
+
+    if id_to_name_entities:  # none of them when synthetic
+        business_entity_type_names = searcher.normalizer.load_business_entity_type_names()
+        stop_words_entities = searcher.find_noise_words(id_to_name_entities, business_entity_type_names)
+        searcher.print_candidate_lookup_benchmark(id_to_name_entities, stop_words_entities, "entity")
+        entity_scanner = aho_corasick.compute_entity_name_scanner(id_to_name_entities, business_entity_type_names)
+        aho_corasick.print_scan_benchmark(entity_scanner, aho_corasick.create_benchmark_text(id_to_name_entities), "entity")
+    return missed
+
+
+def print_results(results):
+    for key, value in results.items():
+        if isinstance(value, float):
+            print("{:30s} {:12.3f}".format(key, value))
+        else:
+            print("{:30s} {:>12}".format(key, value))
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark loading, indexing and searching of a sanction list")
+    arg_parser.add_argument("list_name", choices=["eu", "un", "ofac"], help="Which list's reader and searcher to benchmark")
+    arg_parser.add_argument("--list-file", help="List file to load and search instead of synthetic list subjects")
+    arg_parser.add_argument("--persons", type=int, default=20000, help="Number of synthetic list persons")
+    arg_parser.add_argument("--customers", type=int, default=20000, help="Number of synthetic customers for the batch benchmark")
+    arg_parser.add_argument("--queries", type=int, default=1000, help="Number of single searches to measure latency for")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="Repetitions of load and index builds, the median is reported")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--output", help="Also write the results as JSON to this file, for comparing runs")
+    arg_parser.add_argument("--diagnostics", action="store_true",
+                            help="Also compare the candidate lookups, check the recall of candidate pruning and time the entity scan")
+    args = arg_parser.parse_args()
+
+    (reader, searcher) = import_list_modules(args.list_name)
+    import synthetic
+
+    results = {"list": args.list_name, "seed": args.seed}
+    if args.list_file:
+        results["parse_s"] = benchmark_parse(args.list_name, args.list_file, args.repeat)
+        (results["load_sanctions_s"], id_to_name_persons, id_to_name_entities) = benchmark_load(reader, args.list_name, args.list_file, args.repeat)
+    else:
+        (id_to_name_persons, id_to_name_entities) = synthetic.generate_list_subjects(args.persons, 0, seed=args.seed)
+    results["list_persons"] = len(id_to_name_persons)
+
+    indexes = build_indexes(searcher, id_to_name_persons, results, args.repeat)
+
+    list_persons = synthetic.list_persons_of(id_to_name_persons)
+    customers = list(synthetic.generate_customers(args.queries, list_persons, near_duplicate_rate=0.1, seed=args.seed))
+    benchmark_search(searcher, id_to_name_persons, indexes, customers, results)
+
+    customers = synthetic.generate_customers(args.customers, list_persons, seed=args.seed)
+    benchmark_batch(searcher, id_to_name_persons, indexes, customers, results)
+
+    missed = run_diagnostics(searcher, id_to_name_persons, id_to_name_entities, indexes, results) if args.diagnostics else []
+
+    print_results(results)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2)
+    if missed:
+        sys.exit("Candidate pruning lost {} matches, see above".format(len(missed)))
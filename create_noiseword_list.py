@@ -1,11 +1,12 @@
 # Prints the most common words in the sanction lists.
 # Manually inspect the lists to find noise words (stop words), like "The", "abd", and other words
 # that do not contribute to search results.
+# Writes the stop words per subject type to the files stop_words_persons and stop_words_entities, which the searchers
+# load at startup instead of computing them. Review the files by hand before committing them.
 
-from eu import reader as eu_reader
-from ofac import reader as ofac_reader
-from un import reader as un_reader
 from collections import Counter
+import datetime
+import listloader
 import normalizer
 
 
@@ -44,44 +45,66 @@ def find_most_common_words(sanction_entries, count):
     return (stop_words, stop_words_short)
 
 
-all_entities = []
-all_persons = []
+def find_noise_words(sanction_entries, business_entity_type_names=None):
+    """
+    Same heuristic as find_noise_words in the searchers, but over the entries of all lists
+    """
+    words = []
+    short_words = []
+    for sanction_entry in sanction_entries:
+        (reference, list_subject) = sanction_entry
+        (aliases, birthdates) = list_subject
+        name_parts = normalizer.normalize_aliases(aliases, business_entity_type_names)
+        for name_part in name_parts:
+            if len(name_part) < 2:
+                continue
+            elif len(name_part) <= 4:
+                short_words.append(name_part)
+            else:
+                words.append(name_part)
+
+    stopword_count = int(1.5 * len(words) / len(set(words)))  # heuristic
+    stopword_count_short_words = int(2 * len(short_words) / len(set(short_words)))  # heuristic
 
-(persons, entities) = eu_reader.load_sanctions("eu/eu_global_full.xml")
-for item in entities.items(): all_entities.append(item)
-for item in persons.items(): all_persons.append(item)
+    stop_words = set([word[0] for word in Counter(words).most_common(stopword_count)])
+    stop_words_short = set([word[0] for word in Counter(short_words).most_common(stopword_count_short_words)])
+    return stop_words.union(stop_words_short)
 
-(persons, entities) = un_reader.load_sanctions("un/consolidated.xml")
-for item in entities.items(): all_entities.append(item)
-for item in persons.items(): all_persons.append(item)
 
-(persons, entities) = ofac_reader.load_sdn_sanctions("ofac/sdn_advanced.xml")
-for item in entities.items(): all_entities.append(item)
-for item in persons.items(): all_persons.append(item)
+def write_stop_words(stop_words, subject_type, sources):
+    filename = normalizer.stop_words_filename(subject_type)
+    version = datetime.datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write("# version {}\n".format(version))
+        f.write("# stop words for subject type {}, from {}\n".format(subject_type, ", ".join(sources)))
+        for word in sorted(stop_words):
+            f.write(word + "\n")
+    print("Wrote {} stop words for subject type {} to file {}".format(len(stop_words), subject_type, filename))
 
-(persons, entities) = ofac_reader.load_consolidated_sanctions("ofac/cons_advanced.xml")
-for item in entities.items(): all_entities.append(item)
-for item in persons.items(): all_persons.append(item)
 
-count = 100
-print("Loaded {} entities and {} persons from sanction lists".format(len(all_entities), len(all_persons)))
-print(count, "most commons words are:\n")
+if __name__ == "__main__":
+    sources = [filename for (list_name, filename) in listloader.LIST_SOURCES]
+    # the lists are parsed in parallel, one process each
+    (all_persons, all_entities) = listloader.merge_lists(listloader.load_lists(listloader.LIST_SOURCES))
 
-(stop_words, stop_words_short) = find_most_common_words(all_persons, count)
-print_word_frequencies(stop_words, stop_words_short, "individuals")
+    count = 100
+    print("Loaded {} entities and {} persons from sanction lists".format(len(all_entities), len(all_persons)))
+    print(count, "most commons words are:\n")
 
-(stop_words, stop_words_short) = find_most_common_words(all_entities, int(count*2.5))
-print_word_frequencies(stop_words, stop_words_short, "entities")
-entity_words = set()
-for subject in stop_words + stop_words_short:
-    entity_words.add((subject[0]))
+    (stop_words, stop_words_short) = find_most_common_words(all_persons, count)
+    print_word_frequencies(stop_words, stop_words_short, "individuals")
 
-business_entity_type_abbreviations = set()
-for entity_abbreviation in open('business_entity_type_names'):
-    business_entity_type_abbreviations.add(entity_abbreviation.strip())
+    (stop_words, stop_words_short) = find_most_common_words(all_entities, int(count*2.5))
+    print_word_frequencies(stop_words, stop_words_short, "entities")
+    entity_words = set()
+    for subject in stop_words + stop_words_short:
+        entity_words.add((subject[0]))
 
-print("Words both in common words for business names and for business entity names are:")
-for word in sorted(business_entity_type_abbreviations.intersection(entity_words)):
-    print(word)
+    business_entity_type_abbreviations = normalizer.load_business_entity_type_names()
 
+    print("Words both in common words for business names and for business entity names are:")
+    for word in sorted(business_entity_type_abbreviations.intersection(entity_words)):
+        print(word)
 
+    write_stop_words(find_noise_words(all_persons), "persons", sources)
+    write_stop_words(find_noise_words(all_entities, business_entity_type_abbreviations), "entities", sources)
@@ -0,0 +1,142 @@
+import functools
+import re
+from timeit import default_timer as timer
+
+import normalizer
+
+word_pattern = re.compile(r'[^\W_]+')  # runs of letters and digits, everything else separates words
+normalize_word = functools.lru_cache(maxsize=2 ** 16)(normalizer.normalize_word)  # ordinary text repeats its words a lot
+
+
+def tokenize(text: str):
+    """
+        Splits text into normalized words, returns a list of (start offset, end offset, normalized word)
+    """
+    return [(m.start(), m.end(), normalize_word(m.group())) for m in word_pattern.finditer(text)]
+
+
+class AhoCorasick:
+    """
+        Aho-Corasick automaton over sequences of normalized words. Matching whole words rather than characters means
+        that a list name is only reported where it starts and ends on a word boundary in the scanned text.
+        States are numbered, state 0 is the root.
+    """
+
+    def __init__(self):
+        self.goto = [{}]  # state -> {word: next state}
+        self.fail = [0]
+        self.outputs = [[]]  # state -> list of pattern indexes ending in this state, including those reached by fail links
+        self.patterns = []  # pattern index -> (words, list of references)
+        self.pattern_index = {}
+
+    def add(self, words: tuple, reference):
+        if words in self.pattern_index:
+            references = self.patterns[self.pattern_index[words]][1]
+            if reference not in references:
+                references.append(reference)
+            return
+
+        state = 0
+        for word in words:
+            next_state = self.goto[state].get(word)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][word] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append([])
+            state = next_state
+
+        self.pattern_index[words] = len(self.patterns)
+        self.outputs[state].append(len(self.patterns))
+        self.patterns.append((words, [reference]))
+
+    def build(self):
+        """
+            Computes the fail links breadth first, must be called after the last add and before scanning
+        """
+        queue = list(self.goto[0].values())
+        position = 0
+        while position < len(queue):
+            state = queue[position]
+            position += 1
+            for word, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fail_state = self.fail[state]
+                while fail_state and word not in self.goto[fail_state]:
+                    fail_state = self.fail[fail_state]
+                self.fail[next_state] = self.goto[fail_state].get(word, 0)
+                self.outputs[next_state] = self.outputs[next_state] + self.outputs[self.fail[next_state]]
+
+    def scan(self, text: str):
+        """
+            Finds all list names embedded in the text, in linear time of the text length.
+            Returns a list of (start offset, end offset, normalized name, list of references), offsets are into the original text
+        """
+        matches = []
+        words = tokenize(text)
+        state = 0
+        for i, (start, end, word) in enumerate(words):
+            while state and word not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(word, 0)
+            for pattern in self.outputs[state]:
+                (pattern_words, references) = self.patterns[pattern]
+                match_start = words[i - len(pattern_words) + 1][0]
+                matches.append((match_start, end, " ".join(pattern_words), references))
+        return matches
+
+    def __len__(self):
+        return len(self.patterns)
+
+
+def compute_entity_name_scanner(id_to_name, business_entity_type_names=None, min_name_length=4):
+    """
+        Builds the automaton over the normalized aliases of all list-entries, without business entity type suffixes.
+        Names shorter than min_name_length characters are left out, they would match all over ordinary text.
+    """
+    if business_entity_type_names is None:
+        business_entity_type_names = normalizer.load_business_entity_type_names()
+
+    scanner = AhoCorasick()
+    for reference, list_subject in id_to_name.items():
+        (aliases, birthdates) = list_subject
+        for alias in aliases:
+            words = [word for (start, end, word) in tokenize(str(alias))]
+            words = normalizer.strip_business_entity_type_names(words, business_entity_type_names)
+            if sum(map(len, words)) < min_name_length:
+                continue
+            scanner.add(tuple(words), reference)
+
+    scanner.build()
+    return scanner
+
+
+def print_scan_benchmark(scanner, text: str, subjectType, repeat=5):
+    start = timer()
+    for _ in range(repeat):
+        matches = scanner.scan(text)
+    time_use_s = (timer() - start) / repeat
+    megabytes = len(text.encode('utf-8')) / 10 ** 6
+    print("Scanned {:.1f} MB of text for {} names of subject type {} in {} ms, {:.1f} MB/s, found {} matches".format(
+        megabytes, len(scanner), subjectType, int(10 ** 3 * time_use_s + 0.5), megabytes / time_use_s if time_use_s else 0, len(matches)))
+
+
+def create_benchmark_text(id_to_name, size_bytes=10 ** 6, names_every=20):
+    """
+        Payment reference like text of approximately size_bytes, with a list alias embedded in every names_every-th line
+    """
+    filler = ["invoice {} for consulting services, ref. {}/{}", "transfer to account {} according to agreement {} of {}",
+              "payment for order no. {} delivered {} - {} pcs"]
+    aliases = [str(alias) for (aliases, birthdates) in id_to_name.values() for alias in aliases]
+    lines = []
+    size = 0
+    i = 0
+    while size < size_bytes:
+        line = filler[i % len(filler)].format(i, i * 7 % 1000, 2000 + i % 25)
+        if aliases and i % names_every == 0:
+            line += " " + aliases[(i // names_every) % len(aliases)] + " Ltd"
+        lines.append(line)
+        size += len(line) + 1
+        i += 1
+    return "\n".join(lines)
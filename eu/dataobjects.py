@@ -1,3 +1,6 @@
+from datetime import date
+
+
 class NameAlias:
     def __init__(self, name_parts: list = None, name_language: str = None, gender: str = None):
         self.name_parts = [n for n in name_parts if n.is_not_empty()]
@@ -9,7 +12,7 @@ class NameAlias:
 
 
 class NamePart:
-    def __init__(self, part: str, is_firstname: bool = True):
+    def __init__(self, part: str, is_firstname: bool = False):  # unknown name parts are treated as surnames, the more reliable kind
         self.part = part.strip()
         self.is_firstname = is_firstname
 
@@ -30,3 +33,30 @@ class ListSubject:
 
     def __repr__(self):
         return self.namealiases
+
+
+class BirthdateInterval:
+    """
+        A birthdate as an interval of date ordinals, both ends included. Covers exact dates, year-only dates and ranges.
+    """
+    def __init__(self, start, end=None):
+        self.start = start.toordinal()
+        self.end = end.toordinal() if end else self.start
+
+    def contains(self, ordinal: int):
+        return self.start <= ordinal <= self.end
+
+    def is_exact(self):
+        return self.start == self.end
+
+    def is_year(self):
+        start = date.fromordinal(self.start)
+        end = date.fromordinal(self.end)
+        return start.year == end.year and (start.month, start.day) == (1, 1) and (end.month, end.day) == (12, 31)
+
+    def __repr__(self):
+        if self.is_exact():
+            return date.fromordinal(self.start).isoformat()
+        if self.is_year():
+            return str(date.fromordinal(self.start).year)
+        return "{}..{}".format(date.fromordinal(self.start).isoformat(), date.fromordinal(self.end).isoformat())
@@ -0,0 +1,173 @@
+import io
+import os
+import threading
+import time
+from timeit import default_timer as timer
+
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)  # seconds
+CANDIDATE_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 200, 500, 1000, 5000)
+
+# name -> (type, help text), the names are prefixed with the registry's prefix
+METRICS = {
+    "search_duration_seconds": ("histogram", "Duration of search() calls, not counting query cache hits"),
+    "search_candidates": ("histogram", "Candidates scored per search() call"),
+    "searches_total": ("counter", "search() calls, by the stage they returned from"),
+    "query_cache_hits_total": ("counter", "Query cache lookups finding the results"),
+    "query_cache_misses_total": ("counter", "Query cache lookups not finding the results"),
+    "query_cache_hit_ratio": ("gauge", "Share of the query cache lookups finding the results"),
+    "query_cache_entries": ("gauge", "Results held in the query cache"),
+    "list_subjects": ("gauge", "List subjects loaded"),
+    "index_bins": ("gauge", "Phonetic bins in the index"),
+    "index_postings": ("gauge", "References from the phonetic bins to list subject aliases"),
+    "index_longest_bin_postings": ("gauge", "References in the largest phonetic bin"),
+    "list_load_duration_seconds": ("gauge", "Duration of the last load of the list"),
+    "list_last_reload_timestamp_seconds": ("gauge", "Unix time of the last load of the list"),
+}
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)  # not cumulative, the +Inf bucket is count
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, upper_bound in enumerate(self.buckets):
+            if value <= upper_bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+
+def format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join('{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"')) for (name, value) in pairs) + "}"
+
+
+class Metrics:
+    """
+        Counters, gauges and histograms of the searchers, in the Prometheus text format. Written to a file with write_file,
+        for the node exporter's textfile collector, or served from a local endpoint with serve.
+        search_sink gives a search() trace sink (see searchtrace.py), the other metrics are recorded by the functions below.
+    """
+
+    def __init__(self, prefix="sanction_search"):
+        self.prefix = prefix
+        self.values = {}  # (name, sorted labels) -> number or Histogram
+        self.lock = threading.Lock()  # the endpoint reads from another thread
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.values[key] = value
+
+    def observe(self, name, value, buckets, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            if key not in self.values:
+                self.values[key] = Histogram(buckets)
+            self.values[key].observe(value)
+
+    def search_sink(self, list_name, subject_type):
+        def sink(trace):
+            self.observe("search_duration_seconds", trace.total_seconds, LATENCY_BUCKETS, list=list_name, subject_type=subject_type)
+            self.observe("search_candidates", trace.counts.get("candidates scored", 0), CANDIDATE_BUCKETS, list=list_name, subject_type=subject_type)
+            self.inc("searches_total", list=list_name, subject_type=subject_type, exit=trace.exit)
+        return sink
+
+    def record_load(self, list_name, load_function, *args, **kwargs):
+        """
+            Calls the reader's load function, records its duration and time. Returns what it returns
+        """
+        start = timer()
+        loaded = load_function(*args, **kwargs)
+        self.set("list_load_duration_seconds", timer() - start, list=list_name)
+        self.set("list_last_reload_timestamp_seconds", time.time(), list=list_name)
+        return loaded
+
+    def record_index(self, list_name, subject_type, bin_to_id, id_to_name):
+        postings = 0
+        longest_bin = 0
+        for bin, references in bin_to_id.items():
+            postings += len(references)
+            longest_bin = max(longest_bin, len(references))
+        self.set("list_subjects", len(id_to_name), list=list_name, subject_type=subject_type)
+        self.set("index_bins", len(bin_to_id), list=list_name, subject_type=subject_type)
+        self.set("index_postings", postings, list=list_name, subject_type=subject_type)
+        self.set("index_longest_bin_postings", longest_bin, list=list_name, subject_type=subject_type)
+
+    def record_query_cache(self, list_name, subject_type, query_cache):
+        # the cache counts since its creation, so these are set rather than incremented
+        self.set("query_cache_hits_total", query_cache.hits, list=list_name, subject_type=subject_type)
+        self.set("query_cache_misses_total", query_cache.misses, list=list_name, subject_type=subject_type)
+        self.set("query_cache_hit_ratio", query_cache.hit_rate(), list=list_name, subject_type=subject_type)
+        self.set("query_cache_entries", len(query_cache), list=list_name, subject_type=subject_type)
+
+    def exposition(self):
+        """
+            Returns the metrics in the Prometheus text exposition format
+        """
+        with self.lock:
+            values = sorted(self.values.items(), key=lambda item: item[0])
+            lines = []
+            described = set()
+            for ((name, labels), value) in values:
+                full_name = "{}_{}".format(self.prefix, name)
+                if name not in described:
+                    (metric_type, help_text) = METRICS.get(name, ("untyped", name))
+                    lines.append("# HELP {} {}".format(full_name, help_text))
+                    lines.append("# TYPE {} {}".format(full_name, metric_type))
+                    described.add(name)
+                if isinstance(value, Histogram):
+                    cumulative = 0
+                    for upper_bound, count in zip(value.buckets, value.counts):
+                        cumulative += count
+                        lines.append("{}_bucket{} {}".format(full_name, format_labels(labels, [("le", upper_bound)]), cumulative))
+                    lines.append("{}_bucket{} {}".format(full_name, format_labels(labels, [("le", "+Inf")]), value.count))
+                    lines.append("{}_sum{} {}".format(full_name, format_labels(labels), value.sum))
+                    lines.append("{}_count{} {}".format(full_name, format_labels(labels), value.count))
+                else:
+                    lines.append("{}{} {}".format(full_name, format_labels(labels), value))
+        return "\n".join(lines) + "\n"
+
+    def write_file(self, filename):
+        # written aside and renamed, so a collector never reads a half written file
+        with io.open(filename + ".tmp", 'w', encoding='utf-8') as metrics_file:
+            metrics_file.write(self.exposition())
+        os.replace(filename + ".tmp", filename)
+
+    def serve(self, port, host="127.0.0.1"):
+        """
+            Serves the metrics on http://host:port/metrics from a background thread, until the process exits
+        """
+        import http.server  # slow to import, and only needed when serving
+        metrics = self
+
+        class MetricsHandler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.exposition().encode('utf-8')
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # no line per scrape in the output
+
+        server = http.server.ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
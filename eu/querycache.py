@@ -0,0 +1,107 @@
+import sys
+from collections import OrderedDict
+from timeit import default_timer as timer
+
+import normalizer
+import dateindex
+from dataobjects import NamePart
+from dataobjects import NameAlias
+
+
+def make_query_key(name_string, gender, birthdate, similarity_threshold=None, business_entity_type_names=None, search_options=None):
+    """
+        Queries with equal keys have equal search results
+    """
+    name_key = normalizer.normalize_name_key(NameAlias([NamePart(name_string)]), business_entity_type_names)
+    return (name_key, gender or None, dateindex.parse_birthdate(birthdate), similarity_threshold, make_options_key(search_options or {}))
+
+
+def make_options_key(search_options):
+    """
+        Key of the other search() options, by the value of the numbers and by the identity of the lookup tables, which
+        are built once per list. The trace sink does not change the results and is left out.
+    """
+    return tuple(sorted((name, value if value is None or isinstance(value, (int, float, str)) else id(value))
+                        for (name, value) in search_options.items() if name != "trace_sink"))
+
+
+class QueryCache:
+    """
+        LRU cache of search results, with a time to live per entry. Keyed by the normalized, token-sorted query name, gender,
+        birthdate, similarity threshold and the other search options. Emptied automatically when used with another list
+        than it was filled for.
+    """
+
+    def __init__(self, max_size=100000, ttl_seconds=24 * 3600):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()  # key -> (expiry time, results), least recently used first
+        self.list_identity = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def make_key(self, name_string, gender, birthdate, similarity_threshold, business_entity_type_names=None, search_options=None):
+        return make_query_key(name_string, gender, birthdate, similarity_threshold, business_entity_type_names, search_options)
+
+    def check_list(self, id_to_name):
+        # a reload of the list gives a new dictionary, the cached results are for the old one
+        if self.list_identity is not id_to_name:
+            if self.list_identity is not None:
+                self.invalidate()
+            self.list_identity = id_to_name
+
+    def invalidate(self):
+        self.entries.clear()
+        self.invalidations += 1
+
+    def get(self, key):
+        """
+            Returns the cached results, or None
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        (expiry_time, results) = entry
+        if expiry_time < timer():
+            del self.entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return results
+
+    def put(self, key, results):
+        self.entries[key] = (timer() + self.ttl_seconds, results)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def memory_usage_bytes(self):
+        """
+            Approximate memory use of the cached keys and result lists, not counting the list aliases the results refer to
+        """
+        size = sys.getsizeof(self.entries)
+        for key, (expiry_time, results) in self.entries.items():
+            size += sys.getsizeof(key) + sum(sys.getsizeof(k) for k in key)
+            size += sys.getsizeof(results) + sum(sys.getsizeof(r) for r in results)
+        return size
+
+    def print_stats(self, subjectType):
+        print("Query cache for subject type {}: {} entries, {:.1f}% hit rate ({} hits, {} misses), {} evictions, {} expirations, {} invalidations, approx. {} KB".format(
+            subjectType, len(self.entries), 100 * self.hit_rate(), self.hits, self.misses, self.evictions, self.expirations, self.invalidations,
+            int(self.memory_usage_bytes() / 1024 + 0.5)))
+
+    def __len__(self):
+        return len(self.entries)
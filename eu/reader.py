@@ -3,12 +3,30 @@
 from timeit import default_timer as timer
 from dataobjects import NamePart
 from dataobjects import NameAlias
+from dataobjects import BirthdateInterval
+from datetime import date
 from datetime import datetime
 
-import eu_global as parser
+
+def extract_birthdate(birthdate):
+    circa = birthdate.circa in (True, "true")
+    if birthdate.birthdate:
+        exact_date = datetime.strptime(birthdate.birthdate, '%Y-%m-%d')
+        if circa:
+            return BirthdateInterval(date(exact_date.year - 1, 1, 1), date(exact_date.year + 1, 12, 31))
+        return BirthdateInterval(exact_date)
+    if birthdate.year:
+        year = int(birthdate.year)
+        if circa:
+            return BirthdateInterval(date(year - 1, 1, 1), date(year + 1, 12, 31))
+        return BirthdateInterval(date(year, 1, 1), date(year, 12, 31))
+    if birthdate.yearRangeFrom and birthdate.yearRangeTo:
+        return BirthdateInterval(date(int(birthdate.yearRangeFrom), 1, 1), date(int(birthdate.yearRangeTo), 12, 31))
+    return None
 
 
 def load_sanctions(filename="eu_global_full.xml"):
+    import eu_global as parser  # the generated parser is slow to import, only import it when a list file is parsed
     sanctions = parser.parse(filename, silence=True)
 
     id_to_name_entities = {}
@@ -25,14 +43,17 @@ def load_sanctions(filename="eu_global_full.xml"):
 
             gender_of_alias = alias.gender  # M, F or None
 
-            name_parts = [NamePart(alias.wholeName)]  # TODO correctly separate firstname and other names
+            if alias.lastName:
+                name_parts = [NamePart(alias.firstName or "", True), NamePart(alias.middleName or "", True), NamePart(alias.lastName)]
+            else:
+                name_parts = [NamePart(alias.wholeName)]  # roles unknown, e.g. for entities
             name_alias = NameAlias(name_parts, alias.nameLanguage, gender_of_alias)
 
             aliases.append(name_alias)
 
         if subject.subjectType.code == "person":
-            birth_dates_strings = [b.birthdate for b in subject.birthdate if b.circa != "true"]  # TODO also support year only etc
-            birth_dates = [datetime.strptime(b, '%Y-%m-%d') for b in birth_dates_strings if b]
+            birth_dates = [extract_birthdate(b) for b in subject.birthdate]
+            birth_dates = [b for b in birth_dates if b]
 
             id_to_name_persons[fixedRef] = (aliases, birth_dates)
         else:
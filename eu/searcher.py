@@ -1,8 +1,10 @@
 #!/usr/bin/env python3
 
+import argparse
 import fuzzy
 from timeit import default_timer as timer
 from collections import Counter
+import math
 
 from reader import load_sanctions
 from dataobjects import NamePart
@@ -11,8 +13,15 @@ from dataobjects import NameAlias
 dmeta = fuzzy.DMetaphone()
 
 import normalizer
-
-def find_noise_words(id_to_name):
+import bktree
+import dawg
+import dateindex
+import querycache
+import screening
+import searchtrace
+import metrics
+
+def find_noise_words(id_to_name, business_entity_type_names=None):
     """
     Finds the most common words in the corpus. Use them as stopwords. Uses a higher percentage for stopwords from especially short words.
     TODO should be a static, human-verified list, based on both relevant input names (customer lists) and all of the sanction lists
@@ -21,7 +30,7 @@ def find_noise_words(id_to_name):
     short_words = []
     for reference, list_subject in id_to_name.items():
         (aliases, birthdates) = list_subject
-        name_parts = normalizer.normalize_aliases(aliases)
+        name_parts = normalizer.normalize_aliases(aliases, business_entity_type_names)
         for name_part in name_parts:
             if len(name_part) < 2:
                 continue
@@ -45,17 +54,70 @@ def find_noise_words(id_to_name):
     return stop_words.union(stop_words_short)
 
 
-def compute_phonetic_bin_lookup_table(id_to_name, stop_words):
+def load_noise_words(id_to_name, subject_type, use_static_stop_words=True, business_entity_type_names=None):
+    """
+    Loads the static stop word list for the subject type ("persons" or "entities"), see create_noiseword_list.py.
+    Falls back to computing the stop words from the list, when there is no static list or it is not wanted.
     """
-        Computation of hashmap of phonetic bin to list of list-entries
+    if use_static_stop_words:
+        stop_words = normalizer.load_stop_words(subject_type)
+        if stop_words is not None:
+            return stop_words
+    return find_noise_words(id_to_name, business_entity_type_names)
+
+
+def compute_phonetic_bin_lookup_table(id_to_name, stop_words, business_entity_type_names=None, first_names=None):
+    """
+        Computation of hashmap of phonetic bin to list of (list-entry, name part, alias), one element per alias having the name part,
+        so that search only has to score the aliases sharing a bin with the query.
+        For entities, pass business_entity_type_names to leave legal forms like "inc" and "ltd" out of the bins.
+        Pass first_names=False for a table of surnames and other names only, first_names=True for a table of first names only.
+        Aliases without a surname have all of their names in the surname table.
     """
     bin_to_id = {}
     for reference, list_subject in id_to_name.items():
         (aliases, birthdates) = list_subject
-        unique_name_parts = set(normalizer.normalize_aliases(aliases))
+        for alias in aliases:
+            name_parts = normalizer.normalize_name_alias(alias, business_entity_type_names)
+            alias_first_names = normalizer.normalize_first_names(alias) if first_names is not None else None
+            if alias_first_names is not None and alias_first_names >= name_parts:
+                # no surname, like mononyms and the UN entries with the family name in FIRST_NAME
+                alias_first_names = set()
+            for name_part in name_parts:
+                if len(name_part) < 2 or name_part in stop_words:
+                    # skip stop words and words of one character only, they are in the stop word lookup table
+                    continue
+                if first_names is not None and (name_part in alias_first_names) != first_names:
+                    continue  # belongs in the other table
+
+                try:
+                    bins = [b for b in dmeta(name_part) if b]  # dmeta sometimes outputs an empty 'None' bin, filter it out
+                except UnicodeEncodeError:
+                    continue  # Ignores non-latin words silently. That's ok when input is latin alphabet only.
+
+                for bin in bins:
+                    if not bin in bin_to_id:  # if bin not already added to dictionary
+                        bin_to_id[bin] = []  # begin a new list of references
+
+                    bin_to_id[bin].append((reference, name_part, alias))
+
+    max_count = len(id_to_name) / 8  # if 100%/8 = 12.5% or more of the entries has it
+    split_dict = split_outliers(bin_to_id, max_count)
+
+    return split_dict
+
+
+def compute_stop_word_lookup_table(id_to_name, stop_words, business_entity_type_names=None):
+    """
+        Computation of hashmap of phonetic bin to {list-entry: name parts} for the stop words left out of the phonetic bin lookup table.
+        A low priority tier, search only looks here to confirm candidates, or when the other name parts find no candidates at all.
+    """
+    stop_bin_to_id = {}
+    for reference, list_subject in id_to_name.items():
+        (aliases, birthdates) = list_subject
+        unique_name_parts = set(normalizer.normalize_aliases(aliases, business_entity_type_names))
         for name_part in unique_name_parts:
-            if len(name_part) < 2 or name_part in stop_words:
-                # skip stop words and words of one character only. TODO consider including stopwords, but penalise matches by stopword only
+            if len(name_part) < 2 or name_part not in stop_words:
                 continue
 
             try:
@@ -64,85 +126,275 @@ def compute_phonetic_bin_lookup_table(id_to_name, stop_words):
                 continue  # Ignores non-latin words silently. That's ok when input is latin alphabet only.
 
             for bin in bins:
-                if not bin in bin_to_id:  # if bin not already added to dictionary
-                    bin_to_id[bin] = []  # begin a new list of references
+                if not bin in stop_bin_to_id:
+                    stop_bin_to_id[bin] = {}
+                if not reference in stop_bin_to_id[bin]:
+                    stop_bin_to_id[bin][reference] = []
+                stop_bin_to_id[bin][reference].append(name_part)
 
-                bin_to_id[bin].append((reference, name_part))
+    return stop_bin_to_id
 
-    max_count = len(id_to_name) / 8  # if 100%/8 = 12.5% or more of the entries has it
-    filtered_dict = remove_outliers(bin_to_id, max_count)
 
-    return filtered_dict
+def compute_exact_name_lookup_table(id_to_name, business_entity_type_names=None):
+    """
+        Computation of hashmap of normalized, token-sorted alias to list of (list-entry, alias)
+    """
+    name_to_id = {}
+    for reference, list_subject in id_to_name.items():
+        (aliases, birthdates) = list_subject
+        for alias in aliases:
+            name_key = normalizer.normalize_name_key(alias, business_entity_type_names)
+            if not name_key:
+                continue
+
+            if name_key not in name_to_id:
+                name_to_id[name_key] = []
+            name_to_id[name_key].append((reference, alias))
 
+    return name_to_id
 
-def remove_outliers(bin_to_id, max_count):
-    outliers = []
+
+def outlier_bin_key(bin, name_part, band_offset=0):
+    # name parts of an oversized bin are spread over sub-bins by their length, in bands of two characters
+    return (bin, len(name_part) // 2 + band_offset)
+
+
+def split_outliers(bin_to_id, max_count):
+    """
+        Splits the bins holding too many list-entries into sub-bins keyed by (bin, length band), see outlier_bin_key.
+        Before, these bins were removed, which made their name parts unsearchable.
+    """
+    split_dict = {}
     for bin, references in bin_to_id.items():
-        if len(references) > max_count:  # number of elements in the hashbin is greater than
+        if len(set(r[0] for r in references)) > max_count:  # number of list-entries in the hashbin is greater than
             # the number of subjects in total
-            outliers.append(bin)
-    filtered_dict = {key: bin_to_id[key] for key in bin_to_id if key not in outliers}
-    return filtered_dict
+            for (reference, name_part, alias) in references:
+                key = outlier_bin_key(bin, name_part)
+                if not key in split_dict:
+                    split_dict[key] = []
+                split_dict[key].append((reference, name_part, alias))
+        else:
+            split_dict[bin] = references
+    return split_dict
 
 
-from fuzzywuzzy import fuzz
-from Levenshtein import StringMatcher as levenshtein_distance
+def find_bin_references(bin_to_id, bin, name_part):
+    """
+        Returns the (list-entry, name part, alias) elements in the bin, looking in the neighbouring length bands if the bin was split
+    """
+    if bin in bin_to_id:
+        return bin_to_id[bin]
 
+    references = []
+    for band_offset in (-1, 0, 1):  # allows for an inserted or deleted character or two
+        key = outlier_bin_key(bin, name_part, band_offset)
+        if key in bin_to_id:
+            references.extend(bin_to_id[key])
+    return references
 
-def search(name_string, bin_to_id, id_to_name, gender=None, birthdate=None, similarity_threshold=60):
-    # TODO should distinguish between first name (less reliable match) and other names.
-    # consider storing in each bin, a namepart object linking to its name linking to its subject, that has name.isFirstName:bool
 
-    # TODO consider searching per name alias instead of per candidate (list of aliases), requires a different data structure for lookups
+from fuzzywuzzy import fuzz
+from Levenshtein import StringMatcher as levenshtein_distance
 
-    # 1. calculate the phonetics bins of the input name
+
+def rank_candidates(candidates, candidate_name_parts, query_name_part_count, max_candidates, first_name_candidates=()):
+    """
+        Returns the max_candidates best candidates, by the number of distinct query name parts they matched, then the summed bin weights.
+        The first_name_candidates, found by their first names only, rank below the candidates found by their other names.
+        Candidates matching query_name_part_count name parts, all those any candidate matched, are always kept, so pruning
+        never loses a match on the whole name.
+    """
+    def score(candidate_id):
+        matched = candidate_name_parts.get(candidate_id, {})
+        return (candidate_id not in first_name_candidates, len(matched), sum(matched.values()))
+
+    ranked = sorted(candidates, key=score, reverse=True)
+    kept = ranked[:max_candidates]
+    for candidate_id in ranked[max_candidates:]:
+        if len(candidate_name_parts.get(candidate_id, {})) == query_name_part_count:
+            kept.append(candidate_id)
+    return kept
+
+
+def is_bad_candidate(list_subject, gender, birthdate):
+    (names, birthdates) = list_subject
+    registered_genders = [g for g in [x.gender for x in names] if g]  # filter out None value for gender, i.e. unknown
+    if gender and len(registered_genders) == 1 and gender not in registered_genders:
+        return True
+    if birthdate and birthdates:
+        # birthdates are known, as intervals of date ordinals
+        if not any(b.contains(birthdate) for b in birthdates):
+            return True
+    # TODO could optionally check birth country
+    return False
+
+
+def search(name_string, bin_to_id, id_to_name, gender=None, birthdate=None, similarity_threshold=60, name_to_id=None, business_entity_type_names=None, stop_bin_to_id=None, max_candidates=None, first_name_bin_to_id=None, birthdate_index=None, trace_sink=None, token_graph=None):
+    # with a trace sink, the stage durations and counts of this search are passed to it, see searchtrace.py
+    trace = searchtrace.SearchTrace(name_string, trace_sink) if trace_sink is not None else None
     name_parts = [NamePart(name_string)]
-    name_parts = normalizer.normalize_name_alias(NameAlias(name_parts, None))
+    name_parts = normalizer.normalize_name_alias(NameAlias(name_parts, None), business_entity_type_names)
+    birthdate = dateindex.parse_birthdate(birthdate)
+    if trace is not None:
+        trace.name_parts = name_parts
+        trace.stage("normalize")
+
+    # 0. exact matches on the normalized name are always scored, at 100, whatever the phonetic bins and the pruning find
+    exact_aliases = {}  # candidate -> aliases equal to the query
+    if name_to_id is not None:
+        name_key = " ".join(sorted(name_parts))
+        for (candidate_id, candidate_name) in name_to_id.get(name_key, []):
+            if is_bad_candidate(id_to_name[candidate_id], gender, birthdate):
+                continue
+            if candidate_id not in exact_aliases:
+                exact_aliases[candidate_id] = set()
+            exact_aliases[candidate_id].add(candidate_name)
+        if trace is not None:
+            trace.count("exact matches", len(exact_aliases))
+            trace.stage("exact name lookup")
 
+    # 1. calculate the phonetics bins of the input name
     bins = set()
     for name_part in name_parts:
-        name_part_bins = [b for b in dmeta(name_part) if b]  # dmeta sometimes outputs an empty 'None' bin, filter it out
+        try:
+            name_part_bins = [b for b in dmeta(name_part) if b]  # dmeta sometimes outputs an empty 'None' bin, filter it out
+        except UnicodeEncodeError:
+            continue  # non-latin name parts have no bins, like in the lookup tables
         for bin in name_part_bins:
             bins.add((bin, name_part))
+    if trace is not None:
+        trace.bins = bins
+        trace.count("bins", len(bins))
+        trace.stage("phonetic bins")
 
     # 2. find candidates with one or more matching bins
     candidates = set()
     name_parts_matched = set()
     bad_candidates = []  # candidates found to be bad matches for the query
-    for (bin, name_part) in bins:
-        if bin in bin_to_id:
-            candidates_in_bin = bin_to_id[bin]
-            for c in candidates_in_bin:
-                (candidate_id, candidate_name_part) = c
-                if candidate_id in bad_candidates:
-                    # we already know this candidate is a bad match
-                    continue
+    candidate_name_parts = {}  # candidate -> {query name part: weight of the rarest bin it matched in}
+    candidate_aliases = {}  # candidate -> set of aliases sharing a bin with the query
+    if birthdate and birthdate_index is not None:
+        # prefilter: list-entries with known birthdates, none of them matching the query, are bad candidates
+        born_on_birthdate = birthdate_index.find(birthdate)
+        born_on_other_date = lambda candidate_id: candidate_id in birthdate_index.dated and candidate_id not in born_on_birthdate
+    else:
+        born_on_other_date = lambda candidate_id: False
+
+    def add_candidates(name_part, postings):
+        # rare bins tell more, like idf. By list-entries, not postings: a list-entry with many aliases would make its bins look common
+        bin_subject_count = len(set(c[0] for c in postings))
+        bin_weight = math.log(len(id_to_name) / bin_subject_count) if bin_subject_count else 0
+        for c in postings:
+            (candidate_id, candidate_name_part, candidate_alias) = c
+            if candidate_id in bad_candidates:
+                # we already know this candidate is a bad match
+                continue
 
-                (names, birthdates) = id_to_name[candidate_id]
-                registered_genders = [g for g in [x.gender for x in names] if g]  # filter out None value for gender, i.e. unknown
-                if gender and len(registered_genders) == 1 and gender not in registered_genders:
-                    # mark the candidate as bad, so that we don't have to consider it again for this search query
-                    bad_candidates.append(candidate_id)
-                    continue  # skip to next candidate
-                if birthdate and birthdates:
-                    # exact birthdates are known
-                    if birthdate not in birthdates:
-                        # mark the candidate as bad, so that we don't have to consider it again for this search query
+            if born_on_other_date(candidate_id) or is_bad_candidate(id_to_name[candidate_id], gender, birthdate):
+                # mark the candidate as bad, so that we don't have to consider it again for this search query
+                bad_candidates.append(candidate_id)
+                continue  # skip to next candidate
+
+            if levenshtein_distance.ratio(name_part, candidate_name_part) >= 0.6:  # do not add really bad matches
+                candidates.add(candidate_id)
+                name_parts_matched.add(name_part)
+                if candidate_id not in candidate_name_parts:
+                    candidate_name_parts[candidate_id] = {}
+                candidate_name_parts[candidate_id][name_part] = max(bin_weight, candidate_name_parts[candidate_id].get(name_part, 0))
+                if candidate_id not in candidate_aliases:
+                    candidate_aliases[candidate_id] = set()
+                candidate_aliases[candidate_id].add(candidate_alias)
+
+    def add_bin_candidates(tier_bin_to_id):
+        for (bin, name_part) in bins:
+            candidates_in_bin = find_bin_references(tier_bin_to_id, bin, name_part)
+            if trace is not None and candidates_in_bin:
+                trace.postings(bin, len(candidates_in_bin))
+            add_candidates(name_part, candidates_in_bin)
+
+    add_bin_candidates(bin_to_id)
+    first_name_candidates = set()  # candidates found by their first names only
+    if first_name_bin_to_id is not None:
+        # first names are less reliable and more common, the candidates found by them only rank below the others when pruning
+        surname_candidates = set(candidates)
+        add_bin_candidates(first_name_bin_to_id)
+        first_name_candidates = candidates - surname_candidates
+    if trace is not None:
+        trace.stage("bin candidates")
+    if token_graph is not None:
+        # the name parts without phonetic bins, like non-latin ones, are looked up by edit distance in the word graph
+        # of all list name parts instead, see dawg.compute_dawg_lookup_table
+        (graph, ordinal_to_id) = token_graph
+        binned_name_parts = set(name_part for (bin, name_part) in bins)
+        for name_part in name_parts:
+            if len(name_part) < 2 or name_part in binned_name_parts:
+                continue
+            for (candidate_name_part, distance, ordinal) in graph.fuzzy_find(name_part, dawg.default_max_distance(name_part)):
+                add_candidates(name_part, ordinal_to_id[ordinal])
+        if trace is not None:
+            trace.stage("word graph candidates")
+
+    # 2b. look up the stop words of the query in their own tier, without letting them flood the candidates
+    if stop_bin_to_id is not None:
+        stop_word_bins = [(bin, name_part) for (bin, name_part) in bins if name_part not in name_parts_matched and bin in stop_bin_to_id]
+        if candidates:
+            # confirm the candidates found by the other name parts, counts towards the phonetic similarity and the ranking
+            for (bin, name_part) in stop_word_bins:
+                candidates_in_bin = stop_bin_to_id[bin]
+                for candidate_id in candidates:
+                    if candidate_id in candidates_in_bin and \
+                            any(levenshtein_distance.ratio(name_part, c) >= 0.6 for c in candidates_in_bin[candidate_id]):
+                        name_parts_matched.add(name_part)
+                        if name_part not in candidate_name_parts[candidate_id]:
+                            candidate_name_parts[candidate_id][name_part] = 0  # common, so no weight
+        else:
+            # only stop words in the query, keep the candidates matching the most of them, and at least two: a single common word
+            # would make every list-entry having it a candidate. An exact match on the whole name is still found by the exact lookup
+            stop_word_matches = {}
+            for (bin, name_part) in stop_word_bins:
+                for candidate_id, stop_word_name_parts in stop_bin_to_id[bin].items():
+                    if candidate_id in bad_candidates:
+                        continue
+                    if born_on_other_date(candidate_id) or is_bad_candidate(id_to_name[candidate_id], gender, birthdate):
                         bad_candidates.append(candidate_id)
-                        continue  # skip to next candidate
-                # TODO also check birthdate ranges, or birthyear list only
-                # TODO could optionally check birth country
-
-                if levenshtein_distance.ratio(name_part, candidate_name_part) >= 0.6:  # do not add really bad matches
+                        continue
+                    if any(levenshtein_distance.ratio(name_part, c) >= 0.6 for c in stop_word_name_parts):
+                        if candidate_id not in stop_word_matches:
+                            stop_word_matches[candidate_id] = set()
+                        stop_word_matches[candidate_id].add(name_part)
+
+            most_matched = max(map(len, stop_word_matches.values()), default=0)
+            for candidate_id, matched in stop_word_matches.items():
+                if len(matched) == most_matched >= 2:
                     candidates.add(candidate_id)
-                    name_parts_matched.add(name_part)
+                    name_parts_matched.update(matched)
+                    candidate_name_parts[candidate_id] = {name_part: 0 for name_part in matched}
+        if trace is not None:
+            trace.stage("stop word candidates")
+
+    # 2c. only score the most promising candidates, ranked by the number of query name parts matched and the rarity of their bins
+    if max_candidates is not None and len(candidates) > max_candidates:
+        # the name parts no candidate matched, like one letter and non-latin ones, are not held against any of them
+        candidates = set(rank_candidates(candidates, candidate_name_parts, len(name_parts_matched), max_candidates, first_name_candidates))
+    for candidate_id, aliases in exact_aliases.items():
+        if candidate_id in candidate_aliases:
+            candidate_aliases[candidate_id].update(aliases)
+        elif candidate_id not in candidates:
+            candidate_aliases[candidate_id] = aliases  # found by the exact name lookup only
+        candidates.add(candidate_id)
+    if trace is not None:
+        trace.count("bad candidates", len(bad_candidates))
+        trace.count("candidates scored", len(candidates))
+        trace.stage("candidate pruning")
 
     # 3. calculate phonetic string similarity
     name_parts_missed = name_parts - name_parts_matched
     matching_character_count = sum(map(len, name_parts_matched))
     missing_character_count = sum(map(len, name_parts_missed))
     phonetic_similarity_ratio = 100 * matching_character_count / (matching_character_count + missing_character_count) if (matching_character_count + missing_character_count) else 0
-    if phonetic_similarity_ratio < 25:  # performance: Early exit for really bad matches
+    if phonetic_similarity_ratio < 25 and not exact_aliases:  # performance: Early exit for really bad matches
+        if trace is not None:
+            trace.finish("phonetic similarity", [])
         return []  # return no matches
 
     # 4. look up candidate names, filter out matches that are really bad, sort the remaining matches by similarity ratio
@@ -157,8 +409,11 @@ def search(name_string, bin_to_id, id_to_name, gender=None, birthdate=None, simi
     for candidate_id in candidates:
         list_subject = id_to_name[candidate_id]
         (list_subject_aliases, birthdays) = list_subject
-        for candidate_name in list_subject_aliases:
-            normalized_candidate_name = " ".join(normalizer.normalize_name_alias(candidate_name))  # TODO precompute this for better performance
+        # only the aliases sharing a bin with the query, all of them for candidates found by stop words only
+        for candidate_name in candidate_aliases.get(candidate_id, list_subject_aliases):
+            normalized_candidate_name = " ".join(normalizer.normalize_name_alias(candidate_name, business_entity_type_names))  # TODO precompute this for better performance
+            if trace is not None:
+                trace.count("aliases scored")
             string_similarity = fuzz.token_sort_ratio(normalized_candidate_name, normalized_query_name)
 
             exact_match = string_similarity == 100
@@ -190,6 +445,9 @@ def search(name_string, bin_to_id, id_to_name, gender=None, birthdate=None, simi
                 # 3. normalize score after applying boosts and penalties
                 similarity_score = max(0, min(similarity_score, 99.9))  # present all non-exact matches as no more than 99.9
 
+            if candidate_name in exact_aliases.get(candidate_id, ()):
+                similarity_score = 100  # the alias equals the query after normalization, ranks above any near match
+
             if similarity_score >= similarity_threshold:
                 element = (candidate_id, similarity_score, candidate_name)
                 filtered_candidates.append(element)
@@ -205,17 +463,159 @@ def search(name_string, bin_to_id, id_to_name, gender=None, birthdate=None, simi
             unique_candidates.append(c)
             seen_candidates.add(candidate_id)
 
+    if trace is not None:
+        trace.stage("scoring")
+        trace.finish("scoring", unique_candidates)
     return unique_candidates
 
 
-def print_longest_overflow_bin_length(bin_to_id, subjectType):
-    longest_list = 0
-    bin_of_longest_list = None
+def cached_search(query_cache, name_string, bin_to_id, id_to_name, gender=None, birthdate=None, similarity_threshold=60, business_entity_type_names=None, **search_options):
+    """
+        search() behind a querycache.QueryCache, for the many repeated queries, like re-checks of the same customers
+    """
+    query_cache.check_list(id_to_name)
+    key = query_cache.make_key(name_string, gender, birthdate, similarity_threshold, business_entity_type_names,
+                               dict(search_options, bin_to_id=bin_to_id))
+    results = query_cache.get(key)
+    if results is None:
+        results = search(name_string, bin_to_id, id_to_name, gender=gender, birthdate=birthdate, similarity_threshold=similarity_threshold,
+                         business_entity_type_names=business_entity_type_names, **search_options)
+        query_cache.put(key, results)
+    return results
+
+
+def print_bin_size_distribution(bin_to_id, subjectType):
+    bin_size_limits = [1, 10, 100, 1000, 10000]
+    bin_size_counts = [0] * (len(bin_size_limits) + 1)
+    split_bins = set()
     for bin, references in bin_to_id.items():
-        if len(references) > longest_list:
-            longest_list = len(references)
-            bin_of_longest_list = bin
-    print("Longest overflow-bin for subject type {} had {} items. With value {}".format(subjectType, longest_list, bin_of_longest_list))
+        if isinstance(bin, tuple):
+            split_bins.add(bin[0])
+        size_class = 0
+        while size_class < len(bin_size_limits) and len(references) > bin_size_limits[size_class]:
+            size_class += 1
+        bin_size_counts[size_class] += 1
+
+    print("Bin size distribution for subject type {}, {} bins of which {} were split by length:".format(subjectType, len(bin_to_id), len(split_bins)))
+    lower_limit = 1
+    for limit, count in zip(bin_size_limits + [None], bin_size_counts):
+        if limit is None:
+            print("  more than {} items: {} bins".format(lower_limit - 1, count))
+        else:
+            print("  {} to {} items: {} bins".format(lower_limit, limit, count))
+            lower_limit = limit + 1
+    if split_bins:
+        print("  split bins:", ", ".join(sorted(str(b) for b in split_bins)))
+
+
+def sample_list_aliases(id_to_name, count):
+    # the first alias of the first count list-entries
+    aliases = []
+    for (list_subject_aliases, birthdates) in id_to_name.values():
+        for alias in list_subject_aliases:
+            aliases.append(alias)
+            break
+        if len(aliases) >= count:
+            break
+    return aliases
+
+
+def check_candidate_pruning_recall(bin_to_id, id_to_name, subjectType, max_candidates, similarity_threshold=90, query_count=1000, stop_words=(), **search_options):
+    """
+        Compares search results with candidate pruning against the plain union of all bin candidates.
+        Queries are list aliases with their first name part left out, so that they share name parts with many list-entries,
+        and the whole aliases having stop words, with their last letter changed, as the stop words only confirm candidates.
+        Returns the (query, list-entry) matches of the union that pruning lost, there should be none.
+    """
+    queries = []
+    for alias in sample_list_aliases(id_to_name, query_count):
+        name_parts = str(alias).split()
+        queries.append(" ".join(name_parts[1:]) if len(name_parts) > 2 else str(alias))
+        if len(name_parts) > 1 and any(normalizer.normalize_word(name_part) in stop_words for name_part in name_parts):
+            last_name_part = name_parts[-1]
+            queries.append(" ".join(name_parts[:-1] + [last_name_part[:-1] + ("a" if last_name_part[-1:].lower() != "a" else "e")]))
+
+    union_time_s = 0
+    pruned_time_s = 0
+    union_result_count = 0
+    missed = []
+    for query in queries:
+        start = timer()
+        union_results = search(query, bin_to_id, id_to_name, similarity_threshold=similarity_threshold, **search_options)
+        union_time_s += timer() - start
+
+        start = timer()
+        pruned_results = search(query, bin_to_id, id_to_name, similarity_threshold=similarity_threshold, max_candidates=max_candidates, **search_options)
+        pruned_time_s += timer() - start
+
+        pruned_ids = set(r[0] for r in pruned_results)
+        union_result_count += len(union_results)
+        missed.extend((query, r[0]) for r in union_results if r[0] not in pruned_ids)
+
+    recall = 100.0 * (union_result_count - len(missed)) / union_result_count if union_result_count else 100.0
+    print("Candidate pruning to {} candidates for subject type {}: recall {:.2f}% of {} matches, {} ms without and {} ms with pruning for {} queries".format(
+        max_candidates, subjectType, recall, union_result_count, int(10 ** 3 * union_time_s + 0.5), int(10 ** 3 * pruned_time_s + 0.5), len(queries)))
+    for (query, candidate_id) in missed:
+        print("  pruning lost {} for '{}'".format(candidate_id, query))
+    return missed
+
+
+def print_candidate_lookup_benchmark(id_to_name, stop_words, subjectType, query_count=1000):
+    """
+        Compares build and query time of the BK-tree and word graph token lookups against the phonetic bin lookup table.
+        Queries are aliases taken from the list itself, so every query hits at least one subject.
+    """
+    queries = [normalizer.normalize_name_alias(alias) for alias in sample_list_aliases(id_to_name, query_count)]
+
+    start = timer()
+    bin_to_id = compute_phonetic_bin_lookup_table(id_to_name, stop_words)
+    phonetic_build_time_s = timer() - start
+
+    start = timer()
+    (tree, token_to_id) = bktree.compute_bktree_lookup_table(id_to_name, stop_words)
+    bktree_build_time_s = timer() - start
+
+    start = timer()
+    phonetic_candidate_count = 0
+    for name_parts in queries:
+        candidates = set()
+        for name_part in name_parts:
+            try:
+                name_part_bins = [b for b in dmeta(name_part) if b]
+            except UnicodeEncodeError:
+                continue
+            for bin in name_part_bins:
+                for (candidate_id, candidate_name_part, candidate_alias) in find_bin_references(bin_to_id, bin, name_part):
+                    candidates.add(candidate_id)
+        phonetic_candidate_count += len(candidates)
+    phonetic_query_time_s = timer() - start
+
+    start = timer()
+    bktree_candidate_count = 0
+    for name_parts in queries:
+        candidates = bktree.find_bktree_candidates(name_parts, tree, token_to_id)
+        bktree_candidate_count += len(candidates)
+    bktree_query_time_s = timer() - start
+
+    start = timer()
+    (graph, ordinal_to_id) = dawg.compute_dawg_lookup_table(id_to_name, stop_words)
+    dawg_build_time_s = timer() - start
+
+    start = timer()
+    dawg_candidate_count = 0
+    for name_parts in queries:
+        candidates = dawg.find_dawg_candidates(name_parts, graph, ordinal_to_id)
+        dawg_candidate_count += len(candidates)
+    dawg_query_time_s = timer() - start
+
+    query_count = max(1, len(queries))
+    print("Benchmark of candidate lookup for subject type {}, {} queries:".format(subjectType, len(queries)))
+    print("  phonetic bins: {} bins, built in {} ms, {} us per query, {:.1f} candidates per query".format(
+        len(bin_to_id), int(10 ** 3 * phonetic_build_time_s + 0.5), int(10 ** 6 * phonetic_query_time_s / query_count + 0.5), phonetic_candidate_count / query_count))
+    print("  BK-tree:       {} tokens, built in {} ms, {} us per query, {:.1f} candidates per query".format(
+        len(tree), int(10 ** 3 * bktree_build_time_s + 0.5), int(10 ** 6 * bktree_query_time_s / query_count + 0.5), bktree_candidate_count / query_count))
+    print("  word graph:    {} tokens in {} nodes and {} edges, built in {} ms, {} us per query, {:.1f} candidates per query".format(
+        len(graph), graph.node_count(), graph.edge_count(), int(10 ** 3 * dawg_build_time_s + 0.5), int(10 ** 6 * dawg_query_time_s / query_count + 0.5), dawg_candidate_count / query_count))
 
 
 def memory_usage_resource():
@@ -234,71 +634,154 @@ import sys
 
 
 def import_test_subjects(filename):
-    # reads a semi-colon value separated file, one person per list
-    # format is firstname;lastname;birthdate;gender
+    # reads a semi-colon value separated file, one person per line, yielding one person at a time
+    # format is firstname;lastname;birthdate;gender;id
+    return screening.RowFile(filename, ('firstname', 'lastname', 'birthdate', 'gender', 'id'))
+
+
+def execute_test_queries(output_filename="test_query_results.csv", sort_results=True, resume=False):
+    #filename = "test_queries.csv"
+    filename = "internal_test_queries.csv"  # file intentionally not in git
+    similarity_threshold = 90
+    start = timer()
+    stats = screening.ScreeningStats()
+    stage_totals = searchtrace.StageTotals()
+    trace_sink = searchtrace.fan_out(stage_totals, slow_query_log, search_metrics.search_sink("eu", "person"))
+    print("Searching for test-subjects read from file '{}', writing matches to '{}'".format(filename, output_filename))
+
+    def query_key(test_subject):
+        (firstname, lastname, birthdate, gender, id) = test_subject
+        return querycache.make_query_key(firstname + " " + lastname, gender, birthdate)
+
+    def search_test_subject(test_subject):
+        (firstname, lastname, birthdate, gender, id) = test_subject
+        wholename = firstname + " " + lastname
+        return cached_search(query_cache_persons, wholename, bin_to_id_persons, id_to_name_persons, gender=gender, birthdate=birthdate, similarity_threshold=similarity_threshold, name_to_id=name_to_id_persons, stop_bin_to_id=stop_bin_to_id_persons, max_candidates=max_candidates,
+                             first_name_bin_to_id=first_name_bin_to_id_persons, birthdate_index=birthdate_index_persons, token_graph=token_graph_persons, trace_sink=trace_sink)
+
+    def result_lines(test_subject, matches):
+        (firstname, lastname, birthdate, gender, id) = test_subject
+        wholename = firstname + " " + lastname
+        for (candidate_id, similarity_score, candidate_name) in matches:
+            yield "{}, {}, {}, {:.2f}".format(id, wholename, candidate_name, similarity_score)
+
+    # test-subjects are read, searched for and written out one chunk at a time, memory use does not grow with the file.
+    # Every chunk ends with a checkpoint, an interrupted run continues from the last one when resumed
+    result_count = screening.screen_file(import_test_subjects(filename), query_key, search_test_subject, result_lines, output_filename,
+                                         resume=resume, stats=stats, search_parameters={'similarity_threshold': similarity_threshold, 'max_candidates': max_candidates},
+                                         on_chunk=lambda: search_metrics.record_query_cache("eu", "person", query_cache_persons))
+    if sort_results:
+        # sort the output on similarity ratio, the last column, descending
+        screening.external_sort(output_filename, key=lambda line: float(line.rsplit(",", 1)[1]), reverse=True)
+
+    end = timer()
+    time_use_s = end - start
+    print("\n")  # end progress-line
+
+    print("Wrote {} matches to '{}'".format(result_count, output_filename))
+    print("\nFound in total {} matches on {} list-subjects. Searched for {} customers.".format(stats.matches, stats.matched_rows, stats.rows))
+    print("Searched {} distinct queries for {} customers, deduplication saved {:.1f}% of the searches.".format(
+        stats.searches, stats.rows, 100 * stats.deduplication_rate()))
+    query_cache_persons.print_stats("person")
+    if slow_query_log is not None:
+        print("Logged {} searches slower than {:.0f} ms to '{}'".format(slow_query_log.logged, 10 ** 3 * slow_query_log.threshold_seconds, slow_query_log.filename))
+    search_metrics.record_query_cache("eu", "person", query_cache_persons)
+    stage_totals.print_summary("person")
+    print("Total time usage for searching: {}s ({}ns per query)".format(int(time_use_s + 0.5), int(10 ** 6 * time_use_s / max(stats.rows, 1) + 0.5)))
+
+
+def import_test_entities(filename):
+    # reads a semi-colon value separated file, one company per line
+    # format is registration_id;business_name
     with io.open(filename, 'r', newline='', encoding='utf-8') as csvfile:
         cvs_reader = csv.DictReader(csvfile, delimiter=';')
         try:
             subjects = []
             rows = list(cvs_reader)  # read it all into memory
             for row in rows:
-                value = (row['firstname'], row['lastname'], row['birthdate'], row['gender'], row['id'])
+                value = (row['business_name'], row['registration_id'])
                 subjects.append(value)
             return subjects
         except csv.Error as e:
             sys.exit('file {}, line {}: {}'.format(filename, cvs_reader.line_num, e))
 
 
-def execute_test_queries():
-    #filename = "test_queries.csv"
-    filename = "internal_test_queries.csv"  # file intentionally not in git
-    test_subjects = import_test_subjects(filename)
+def execute_test_entity_queries():
+    filename = "test_queries_companies.csv"
+    test_subjects = import_test_entities(filename)
     test_subject_count = len(test_subjects)
     start = timer()
     total_matches = 0
     total_records = 0
     all_results = []
-    counter = 0
-    print("Searching for {} test-subjects read from file '{}'".format(test_subject_count, filename))
-    for (firstname, lastname, birthdate, gender, id) in test_subjects:
-        workdone = counter / test_subject_count
-
-        wholename = firstname + " " + lastname
-        matches = search(wholename, bin_to_id_persons, id_to_name_persons, gender=gender, birthdate=birthdate, similarity_threshold=90)
+    trace_sink = searchtrace.fan_out(slow_query_log, search_metrics.search_sink("eu", "entity"))
+    print("Searching for {} test-entities read from file '{}'".format(test_subject_count, filename))
+    for (business_name, id) in test_subjects:
+        matches = cached_search(query_cache_entities, business_name, bin_to_id_entities, id_to_name_entities, similarity_threshold=90,
+                                name_to_id=name_to_id_entities, business_entity_type_names=business_entity_type_names, stop_bin_to_id=stop_bin_to_id_entities, max_candidates=max_candidates,
+                                token_graph=token_graph_entities, trace_sink=trace_sink)
         if matches:
             total_matches += 1
             total_records += len(matches)
             for m in matches:
                 (candidate_id, similarity_score, candidate_name) = m
-                result = (id, wholename, candidate_name, "EU_{}".format(candidate_id), similarity_score)
+                result = (id, business_name, candidate_name, "EU_{}".format(candidate_id), similarity_score)
                 all_results.append(result)
-        print("\rProgress: [{0:50s}] {1:.1f}%".format('#' * int(workdone * 50), workdone * 100), end="", flush=True)
-        counter += 1
 
     end = timer()
     time_use_s = end - start
-    print("\n")  # end progress-line
 
-    # sort the output on similarity ratio before printing
     all_results.sort(key=lambda tup: tup[4], reverse=True)  # sort by ratio, descending
     for result in all_results:
-        (id, wholename, candidate_name, list_entry_id, similarity_score) = result
-        print("{}, {}, {}, {:.2f}".format(id, wholename, candidate_name, similarity_score))
-    
-    print("\nFound in total {} matches on {} list-subjects. Searched for {} customers.".format(total_records, total_matches, test_subject_count))
+        (id, business_name, candidate_name, list_entry_id, similarity_score) = result
+        print("{}, {}, {}, {:.2f}".format(id, business_name, candidate_name, similarity_score))
+
+    print("\nFound in total {} matches on {} list-subjects. Searched for {} entities.".format(total_records, total_matches, test_subject_count))
+    query_cache_entities.print_stats("entity")
+    search_metrics.record_query_cache("eu", "entity", query_cache_entities)
     print("Total time usage for searching: {}s ({}ns per query)".format(int(time_use_s + 0.5), int(10 ** 6 * time_use_s / test_subject_count + 0.5)))
 
 
 if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Search the EU sanction list for the test-subjects")
+    arg_parser.add_argument("--resume", action="store_true", help="Continue an interrupted run of the test queries from its last checkpoint")
+    arg_parser.add_argument("--metrics-file", help="Write the search, index and load metrics to this file in the Prometheus text format")
+    arg_parser.add_argument("--metrics-port", type=int, help="Serve the metrics on http://127.0.0.1:<port>/metrics while running")
+    arg_parser.add_argument("--slow-query-log", help="Append the searches slower than --slow-query-ms to this file, as JSON lines")
+    arg_parser.add_argument("--slow-query-ms", type=float, default=100, help="Latency from which a search is logged as slow (default 100 ms)")
+    arg_parser.add_argument("--computed-stop-words", action="store_true",
+                            help="Compute the stop words from the loaded list instead of loading the static stop word lists")
+    args = arg_parser.parse_args()
+
+    search_metrics = metrics.Metrics()
+    if args.metrics_port:
+        search_metrics.serve(args.metrics_port)
+    slow_query_log = searchtrace.SlowQueryLog(args.slow_query_log, args.slow_query_ms / 1000) if args.slow_query_log else None
+
     mem_start = memory_usage_resource()
 
-    (id_to_name_persons, id_to_name_entities) = load_sanctions('eu_global_full.xml')
+    (id_to_name_persons, id_to_name_entities) = search_metrics.record_load("eu", load_sanctions, 'eu_global_full.xml')
 
-    stop_words_persons = find_noise_words(id_to_name_persons)
-    stop_words_entities = find_noise_words(id_to_name_entities)
+    stop_words_persons = load_noise_words(id_to_name_persons, "persons", use_static_stop_words=not args.computed_stop_words)
+    business_entity_type_names = normalizer.load_business_entity_type_names()
+    stop_words_entities = load_noise_words(id_to_name_entities, "entities", use_static_stop_words=not args.computed_stop_words,
+                                           business_entity_type_names=business_entity_type_names)
 
-    bin_to_id_persons = compute_phonetic_bin_lookup_table(id_to_name_persons, stop_words_persons)
-    bin_to_id_entities = compute_phonetic_bin_lookup_table(id_to_name_entities, stop_words_entities)
+    bin_to_id_persons = compute_phonetic_bin_lookup_table(id_to_name_persons, stop_words_persons, first_names=False)
+    first_name_bin_to_id_persons = compute_phonetic_bin_lookup_table(id_to_name_persons, stop_words_persons, first_names=True)
+    bin_to_id_entities = compute_phonetic_bin_lookup_table(id_to_name_entities, stop_words_entities, business_entity_type_names)
+
+    name_to_id_persons = compute_exact_name_lookup_table(id_to_name_persons)
+    name_to_id_entities = compute_exact_name_lookup_table(id_to_name_entities, business_entity_type_names)
+
+    stop_bin_to_id_persons = compute_stop_word_lookup_table(id_to_name_persons, stop_words_persons)
+    stop_bin_to_id_entities = compute_stop_word_lookup_table(id_to_name_entities, stop_words_entities, business_entity_type_names)
+    token_graph_persons = dawg.compute_dawg_lookup_table(id_to_name_persons, stop_words_persons)
+    token_graph_entities = dawg.compute_dawg_lookup_table(id_to_name_entities, stop_words_entities, business_entity_type_names)
+    max_candidates = 200  # the most promising candidates to score per query, see benchmark.py --diagnostics
+    birthdate_index_persons = dateindex.BirthdateIndex(id_to_name_persons)
+    query_cache_persons = querycache.QueryCache()
+    query_cache_entities = querycache.QueryCache()
 
     mem_end = memory_usage_resource()
 
@@ -306,10 +789,18 @@ if __name__ == "__main__":
     print("Most common name parts for entities are", stop_words_entities)
 
     print("Computed", len(bin_to_id_persons), "phonetic bins for", len(id_to_name_persons), "list subjects of type person.")
-    print_longest_overflow_bin_length(bin_to_id_persons, "person")
+    search_metrics.record_index("eu", "person", bin_to_id_persons, id_to_name_persons)
+    print_bin_size_distribution(bin_to_id_persons, "person")
     print("Computed", len(bin_to_id_entities), "phonetic bins for", len(id_to_name_entities), "list subjects of type entity.")
-    print_longest_overflow_bin_length(bin_to_id_entities, "entity")
+    search_metrics.record_index("eu", "entity", bin_to_id_entities, id_to_name_entities)
+    print_bin_size_distribution(bin_to_id_entities, "entity")
 
     print("Memory usage of sanction-list data structures are", mem_end - mem_start, "MB")
 
-    execute_test_queries()
+    execute_test_queries(resume=args.resume)
+    execute_test_entity_queries()
+
+    if args.metrics_file:
+        search_metrics.write_file(args.metrics_file)
+    if slow_query_log is not None:
+        slow_query_log.close()
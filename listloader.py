@@ -0,0 +1,84 @@
+# Loads several sanction lists at once, for the scripts combining all of them, like create_noiseword_list.py and
+# export_list_subjects.py. Each list is parsed in a process of its own, so the wall time is about that of the slowest
+# list rather than the sum of them; parsing is CPU bound, threads would not help.
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from timeit import default_timer as timer
+
+
+LIST_SOURCES = [("eu", "eu/eu_global_full.xml"), ("un", "un/consolidated.xml"),
+                ("ofac_sdn", "ofac/sdn_advanced.xml"), ("ofac_consolidated", "ofac/cons_advanced.xml")]
+
+
+def add_list_directory(directory):
+    # the readers import their generated parser module as a top level module, from their own directory
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), directory)
+    if path not in sys.path:
+        sys.path.append(path)
+
+
+def available_cpus():
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def load_list(list_name, filename):
+    """
+        Loads one list with its reader, returns (id_to_name_persons, id_to_name_entities, seconds used)
+    """
+    start = timer()
+    if list_name == "eu":
+        add_list_directory("eu")
+        from eu import reader as eu_reader
+        (persons, entities) = eu_reader.load_sanctions(filename)
+    elif list_name == "un":
+        add_list_directory("un")
+        from un import reader as un_reader
+        (persons, entities) = un_reader.load_sanctions(filename)
+    elif list_name in ("ofac_sdn", "ofac_consolidated"):
+        add_list_directory("ofac")
+        from ofac import reader as ofac_reader
+        load = ofac_reader.load_sdn_sanctions if list_name == "ofac_sdn" else ofac_reader.load_consolidated_sanctions
+        (persons, entities, entity_name_to_id_map) = load(filename)
+    else:
+        raise ValueError("Unknown list {}".format(list_name))
+    return (persons, entities, timer() - start)
+
+
+def load_lists(sources=LIST_SOURCES, parallel=True):
+    """
+        Loads the (list name, filename) sources, returns a list of (id_to_name_persons, id_to_name_entities) in the
+        order of the sources. With parallel, the lists are loaded in worker processes, one per CPU up to one per list,
+        and the loaded list subjects are pickled back to this one. With a single CPU they are loaded one by one here,
+        workers would only take turns and add the pickling.
+    """
+    start = timer()
+    workers = min(len(sources), available_cpus()) if parallel else 1
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(load_list, list_name, filename) for (list_name, filename) in sources]
+            results = [future.result() for future in futures]
+    else:
+        results = [load_list(list_name, filename) for (list_name, filename) in sources]
+
+    loaded = []
+    for ((list_name, filename), (persons, entities, time_use_s)) in zip(sources, results):
+        print("Loaded {} persons and {} entities from {} in {:.1f}s".format(len(persons), len(entities), filename, time_use_s))
+        loaded.append((persons, entities))
+    print("Loaded {} lists in {:.1f}s, {} at a time".format(len(sources), timer() - start, workers))
+    return loaded
+
+
+def merge_lists(loaded):
+    """
+        Returns (all_persons, all_entities), the (reference, list subject) items of all of the loaded lists
+    """
+    all_persons = []
+    all_entities = []
+    for (persons, entities) in loaded:
+        all_persons.extend(persons.items())
+        all_entities.extend(entities.items())
+    return (all_persons, all_entities)
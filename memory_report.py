@@ -0,0 +1,210 @@
+# Reports the memory held by the loaded list subjects and the search indexes built from them, attributed to the
+# aliases, name parts, birthdates and references of the list subjects, and to the keys, postings and name parts of the
+# indexes, per list and subject type. Shows what to compact as the lists grow; memory_usage_resource() in the searchers
+# only gives the max RSS of the whole process.
+# Each list is measured in a process of its own, as the searchers of the lists import their modules by the same names.
+# A list name without a list file measures synthetic list subjects (see synthetic.py).
+#
+#     $ python3 memory_report.py eu=eu/eu_global_full.xml un=un/consolidated.xml ofac=ofac/sdn_advanced.xml
+#     $ python3 memory_report.py ofac --persons 100000 --entities 20000
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+
+def deep_size(obj, seen):
+    """
+        Bytes of obj and of the objects it refers to, leaving out the objects in seen, the ids of objects already
+        counted elsewhere. Adds the ids of the objects it counts to seen.
+    """
+    size = 0
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        if id(o) in seen:
+            continue
+        seen.add(id(o))
+        size += sys.getsizeof(o)
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            stack.extend(o)
+        elif hasattr(o, '__dict__'):
+            stack.append(o.__dict__)
+        elif hasattr(o, '__slots__'):
+            stack.extend(getattr(o, name) for name in o.__slots__ if hasattr(o, name))
+    return size
+
+
+def account_list_subjects(id_to_name, seen):
+    """
+        Returns {category: bytes} and {category: count} for the list subjects. Counted from the inside out, so that
+        the name parts are not counted with the aliases holding them, nor the aliases with the dictionary
+    """
+    sizes = {"name parts": 0, "aliases": 0, "birthdates": 0, "references": 0}
+    counts = {"name parts": 0, "aliases": 0, "birthdates": 0, "references": len(id_to_name)}
+    for reference, list_subject in id_to_name.items():
+        (aliases, birthdates) = list_subject
+        for alias in aliases:
+            for name_part in alias.name_parts:
+                sizes["name parts"] += deep_size(name_part, seen)
+            counts["name parts"] += len(alias.name_parts)
+            sizes["aliases"] += deep_size(alias, seen)
+        sizes["aliases"] += deep_size(aliases, seen)
+        counts["aliases"] += len(aliases)
+        sizes["birthdates"] += deep_size(birthdates, seen)
+        counts["birthdates"] += len(birthdates)
+    sizes["references"] = deep_size(id_to_name, seen)  # the dictionary, its keys and the (aliases, birthdates) tuples
+    return (sizes, counts)
+
+
+def account_bin_index(bin_to_id, seen):
+    """
+        Returns {category: bytes} and {category: count} for a phonetic bin lookup table. The list subjects and aliases
+        the postings refer to are left out, they are counted with the list subjects.
+    """
+    sizes = {"bin keys": sys.getsizeof(bin_to_id), "postings": 0, "posting name parts": 0}
+    counts = {"bin keys": len(bin_to_id), "postings": 0, "posting name parts": 0}
+    seen.add(id(bin_to_id))
+    for bin, references in bin_to_id.items():
+        sizes["bin keys"] += deep_size(bin, seen)
+        for (reference, name_part, alias) in references:
+            size = deep_size(name_part, seen)
+            if size:
+                sizes["posting name parts"] += size
+                counts["posting name parts"] += 1
+        sizes["postings"] += deep_size(references, seen)
+        counts["postings"] += len(references)
+    return (sizes, counts)
+
+
+def import_list_modules(list_name):
+    # the searchers import their reader and shared modules as top level modules from their own directory
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), list_name))
+    import reader
+    import searcher
+    return (reader, searcher)
+
+
+def load_list(reader, list_name, list_filename):
+    if list_name == "ofac":
+        (id_to_name_persons, id_to_name_entities, entity_name_to_id_map) = reader.load_sdn_sanctions(list_filename)
+    else:
+        (id_to_name_persons, id_to_name_entities) = reader.load_sanctions(list_filename)
+    return (id_to_name_persons, id_to_name_entities)
+
+
+def measure_list(searcher, id_to_name, subject_type):
+    """
+        Returns rows of (structure, category, bytes, count) for the list subjects of one type and the indexes the
+        searcher builds over them
+    """
+    seen = set()
+    rows = []
+    (sizes, counts) = account_list_subjects(id_to_name, seen)
+    rows.extend(("list subjects", category, sizes[category], counts[category]) for category in sizes)
+    if not id_to_name:
+        return rows
+
+    business_entity_type_names = searcher.normalizer.load_business_entity_type_names() if subject_type == "entity" else None
+    stop_words = searcher.find_noise_words(id_to_name, business_entity_type_names)
+    if subject_type == "person":
+        bin_tables = [("phonetic bins", searcher.compute_phonetic_bin_lookup_table(id_to_name, stop_words, first_names=False)),
+                      ("first name phonetic bins", searcher.compute_phonetic_bin_lookup_table(id_to_name, stop_words, first_names=True))]
+    else:
+        bin_tables = [("phonetic bins", searcher.compute_phonetic_bin_lookup_table(id_to_name, stop_words, business_entity_type_names))]
+    for (structure, bin_to_id) in bin_tables:
+        (sizes, counts) = account_bin_index(bin_to_id, seen)
+        rows.extend((structure, category, sizes[category], counts[category]) for category in sizes)
+
+    stop_bin_to_id = searcher.compute_stop_word_lookup_table(id_to_name, stop_words, business_entity_type_names)
+    rows.append(("stop word bins", "all", deep_size(stop_bin_to_id, seen), len(stop_bin_to_id)))
+    name_to_id = searcher.compute_exact_name_lookup_table(id_to_name, business_entity_type_names)
+    rows.append(("exact names", "all", deep_size(name_to_id, seen), len(name_to_id)))
+    (graph, ordinal_to_id) = searcher.dawg.compute_dawg_lookup_table(id_to_name, stop_words, business_entity_type_names)
+    rows.append(("word graph", "nodes", deep_size(graph, seen), graph.node_count()))
+    rows.append(("word graph", "postings", deep_size(ordinal_to_id, seen), len(graph)))
+    if subject_type == "person":
+        birthdate_index = searcher.dateindex.BirthdateIndex(id_to_name)
+        rows.append(("birthdate index", "all", deep_size(birthdate_index, seen), len(birthdate_index.dated)))
+    return rows
+
+
+def measure(list_name, list_filename, persons, entities, seed):
+    """
+        Returns the report rows of one list, (list, subject type, structure, category, bytes, count)
+    """
+    (reader, searcher) = import_list_modules(list_name)
+    if list_filename:
+        (id_to_name_persons, id_to_name_entities) = load_list(reader, list_name, list_filename)
+    else:
+        import synthetic
+        (id_to_name_persons, id_to_name_entities) = synthetic.generate_list_subjects(persons, entities, seed=seed)
+
+    label = "{}:{}".format(list_name, os.path.basename(list_filename)) if list_filename else list_name
+    report = []
+    for (subject_type, id_to_name) in (("person", id_to_name_persons), ("entity", id_to_name_entities)):
+        report.extend((label, subject_type) + row for row in measure_list(searcher, id_to_name, subject_type))
+    return report
+
+
+def print_report(report):
+    total = sum(row[4] for row in report) or 1
+    print("{:24s} {:8s} {:26s} {:20s} {:>10s} {:>6s} {:>10s} {:>9s}".format(
+        "list", "subject", "structure", "category", "MB", "share", "count", "B/count"))
+    for (label, subject_type, structure, category, size, count) in report:
+        print("{:24s} {:8s} {:26s} {:20s} {:10.2f} {:5.1f}% {:10d} {:9.1f}".format(
+            label, subject_type, structure, category, size / 2 ** 20, 100 * size / total, count, size / count if count else 0))
+
+    print("\nPer list:")
+    list_totals = {}
+    for row in report:
+        list_totals[row[0]] = list_totals.get(row[0], 0) + row[4]
+    for label, size in list_totals.items():
+        print("{:24s} {:10.2f} MB {:5.1f}%".format(label, size / 2 ** 20, 100 * size / total))
+
+    print("\nPer category, over all lists:")
+    category_totals = {}
+    for row in report:
+        key = "{} {}".format(row[2], row[3]) if row[3] != "all" else row[2]
+        category_totals[key] = category_totals.get(key, 0) + row[4]
+    for key, size in sorted(category_totals.items(), key=lambda item: item[1], reverse=True):
+        print("{:48s} {:10.2f} MB {:5.1f}%".format(key, size / 2 ** 20, 100 * size / total))
+    print("\nTotal {:.2f} MB".format(total / 2 ** 20))
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Report the memory used by the list subjects and search indexes of the sanction lists")
+    arg_parser.add_argument("lists", nargs="+", metavar="LIST[=FILE]",
+                            help="eu, un or ofac, with the list file to load, or without it for synthetic list subjects")
+    arg_parser.add_argument("--persons", type=int, default=20000, help="Number of synthetic list persons")
+    arg_parser.add_argument("--entities", type=int, default=5000, help="Number of synthetic list entities")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--json", action="store_true", help="Print the report rows as JSON instead of the tables")
+    args = arg_parser.parse_args()
+
+    specs = [spec.split("=", 1) if "=" in spec else (spec, None) for spec in args.lists]
+    for (list_name, list_filename) in specs:
+        if list_name not in ("eu", "un", "ofac"):
+            arg_parser.error("unknown list {}, expected eu, un or ofac".format(list_name))
+
+    if len(specs) == 1:
+        (list_name, list_filename) = specs[0]
+        report = measure(list_name, list_filename, args.persons, args.entities, args.seed)
+    else:
+        report = []
+        for spec in args.lists:
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), spec, "--json", "--persons", str(args.persons),
+                                     "--entities", str(args.entities), "--seed", str(args.seed)],
+                                    check=True, stdout=subprocess.PIPE).stdout
+            # the readers print their progress, the report is the last line
+            report.extend(tuple(row) for row in json.loads(output.splitlines()[-1]))
+
+    if args.json:
+        print(json.dumps(report))
+    else:
+        print_report(report)
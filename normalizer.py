@@ -1,11 +1,13 @@
+import os
 import unicodedata
 from dataobjects import NameAlias
+from dataobjects import NamePart
 
 
-def normalize_aliases(name_aliases: list):
+def normalize_aliases(name_aliases: list, excluded_words=None):
     all_name_parts = set()
     for name_alias in name_aliases:
-        normalized_name_alias = normalize_name_alias(name_alias)
+        normalized_name_alias = normalize_name_alias(name_alias, excluded_words)
         for value in normalized_name_alias:
             all_name_parts.add(value)
 
@@ -15,22 +17,57 @@ def normalize_aliases(name_aliases: list):
 import functools
 
 
-def normalize_name_alias(name_alias: NameAlias):
-    all_name_parts = set()
+def normalize_name_alias(name_alias: NameAlias, excluded_words=None):
+    words = []
     for name_part in name_alias.name_parts:
+        words.extend(normalize_name_part(name_part))
+
+    if excluded_words:
+        # e.g. business entity types like "ltd" and "gmbh" ending the name. Only trailing ones, the same words occur
+        # inside of names: "jamaat ud dawa", "riyadh as saliheen"
+        words = strip_business_entity_type_names(words, excluded_words)
+    return set(words)
+
+
+def strip_business_entity_type_names(words: list, business_entity_type_names):
+    """
+        Removes trailing legal forms, e.g. "acme trading co ltd" -> "acme trading". Keeps at least one word.
+    """
+    end = len(words)
+    while end > 1 and words[end - 1] in business_entity_type_names:
+        end -= 1
+    return words[:end]
+
 
+def normalize_name_part(name_part: NamePart):
+    name_part_value = name_part.part
+    split_characters = [x for x in name_part_value if not x.isalpha() and not x.isdigit()]
+    if split_characters:
+        name_part_value = functools.reduce(lambda s, sep: s.replace(sep, ' '), split_characters, name_part_value).strip()
+        return [normalize_word(name_part_part) for name_part_part in name_part_value.split()]
+    else:
+        return [normalize_word(name_part_value)]
 
-        name_part_value = name_part.part
-        split_characters = [x for x in name_part_value if not x.isalpha() and not x.isdigit()]
-        if split_characters:
-            name_part_value = functools.reduce(lambda s, sep: s.replace(sep, ' '), split_characters, name_part_value).strip()
-            for name_part_part in name_part_value.split():
-                normalized_name = normalize_word(name_part_part)
-                all_name_parts.add(normalized_name)
+
+def normalize_first_names(name_alias: NameAlias):
+    """
+        The normalized name parts that only occur in first names (and middle names) of the alias
+    """
+    first_names = set()
+    other_names = set()
+    for name_part in name_alias.name_parts:
+        if name_part.is_firstname:
+            first_names.update(normalize_name_part(name_part))
         else:
-            normalized_name = normalize_word(name_part_value)
-            all_name_parts.add(normalized_name)
-    return all_name_parts
+            other_names.update(normalize_name_part(name_part))
+    return first_names - other_names
+
+
+def normalize_name_key(name_alias: NameAlias, excluded_words=None):
+    """
+        Normalized, token-sorted key for a name alias, used for exact lookups. Word order and casing do not matter.
+    """
+    return " ".join(sorted(normalize_name_alias(name_alias, excluded_words)))
 
 
 def normalize_word(word: str):
@@ -43,3 +80,51 @@ def replace_nordic_letters(word: str):
 
 def remove_diacritics(word: str):
     return ''.join(c for c in unicodedata.normalize('NFKD', word) if unicodedata.category(c) != 'Mn')
+
+
+def find_data_file(name: str):
+    # data files live in the repository root, next to this module or one directory above it
+    module_directory = os.path.dirname(os.path.abspath(__file__))
+    filename = os.path.join(module_directory, name)
+    if not os.path.exists(filename):
+        filename = os.path.join(module_directory, os.pardir, name)
+    return filename
+
+
+def load_business_entity_type_names(filename=None):
+    """
+        Reads the legal form abbreviations (gmbh, inc, as, ...) from the business_entity_type_names file, one per line, normalized
+    """
+    if filename is None:
+        filename = find_data_file('business_entity_type_names')
+
+    business_entity_type_names = set()
+    with open(filename, encoding='utf-8') as f:
+        for line in f:
+            word = normalize_word(''.join(c for c in line.strip() if c.isalpha() or c.isdigit()))
+            if word:
+                business_entity_type_names.add(word)
+    return frozenset(business_entity_type_names)
+
+
+def stop_words_filename(subject_type: str):
+    return find_data_file('stop_words_{}'.format(subject_type))
+
+
+def load_stop_words(subject_type: str, filename=None):
+    """
+        Reads the static stop word list for a subject type ("persons" or "entities"), as written by create_noiseword_list.py.
+        Lines starting with # are comments, the first one holds the version. Returns None if there is no such file.
+    """
+    if filename is None:
+        filename = stop_words_filename(subject_type)
+    if not os.path.exists(filename):
+        return None
+
+    stop_words = set()
+    with open(filename, encoding='utf-8') as f:
+        for line in f:
+            word = line.strip()
+            if word and not word.startswith('#'):
+                stop_words.add(word)
+    return frozenset(stop_words)
@@ -0,0 +1,208 @@
+import normalizer
+
+
+class DawgNode:
+    __slots__ = ('edges', 'final', 'count')
+
+    def __init__(self):
+        self.edges = {}  # letter -> DawgNode, in sorted letter order since words are inserted sorted
+        self.final = False
+        self.count = 0  # number of words reachable from this node, used to number the words
+
+    def signature(self):
+        # children are already minimized when this is called, so their identity is canonical
+        return (self.final, tuple((letter, id(child)) for letter, child in self.edges.items()))
+
+
+class Dawg:
+    """
+        Minimized directed acyclic word graph (Daciuk et al.) over a sorted set of words.
+        Shared prefixes and suffixes are stored once. Every word gets an ordinal, its position in sorted order,
+        which is used as an index into a separate list of values.
+    """
+
+    def __init__(self, words=None):
+        self.root = DawgNode()
+        self.previous_word = ""
+        self.unchecked_nodes = []  # (parent, letter, child) along the path of the previous word
+        self.minimized_nodes = {}  # signature -> node, only needed while inserting
+        self.nodes = []
+        self.size = 0
+        if words is not None:
+            for word in words:
+                self.insert(word)
+            self.finish()
+
+    def insert(self, word: str):
+        if word <= self.previous_word and self.size:
+            raise ValueError("Words must be inserted in sorted order, without duplicates: {}".format(word))
+
+        common_prefix = 0
+        for i in range(min(len(word), len(self.previous_word))):
+            if word[i] != self.previous_word[i]:
+                break
+            common_prefix += 1
+
+        self._minimize(common_prefix)
+
+        node = self.unchecked_nodes[-1][2] if self.unchecked_nodes else self.root
+        for letter in word[common_prefix:]:
+            next_node = DawgNode()
+            node.edges[letter] = next_node
+            self.unchecked_nodes.append((node, letter, next_node))
+            node = next_node
+
+        node.final = True
+        self.previous_word = word
+        self.size += 1
+
+    def finish(self):
+        self._minimize(0)
+        self._count(self.root, set())
+        self.nodes = list(self.minimized_nodes.values())
+        self.minimized_nodes = {}
+
+    def _minimize(self, down_to: int):
+        for i in range(len(self.unchecked_nodes) - 1, down_to - 1, -1):
+            (parent, letter, child) = self.unchecked_nodes[i]
+            signature = child.signature()
+            if signature in self.minimized_nodes:
+                parent.edges[letter] = self.minimized_nodes[signature]
+            else:
+                self.minimized_nodes[signature] = child
+            self.unchecked_nodes.pop()
+
+    def _count(self, node, counted):
+        if id(node) in counted:
+            return node.count
+        count = 1 if node.final else 0
+        for child in node.edges.values():
+            count += self._count(child, counted)
+        node.count = count
+        counted.add(id(node))
+        return count
+
+    def index(self, word: str):
+        """
+            Returns the ordinal of the word, or None if it is not in the graph
+        """
+        node = self.root
+        ordinal = 0
+        for letter in word:
+            if node.final:
+                ordinal += 1
+            if letter not in node.edges:
+                return None
+            for edge_letter, child in node.edges.items():
+                if edge_letter == letter:
+                    break
+                ordinal += child.count
+            node = node.edges[letter]
+        return ordinal if node.final else None
+
+    def fuzzy_find(self, word: str, max_distance: int):
+        """
+            Walks the graph as a Levenshtein automaton, pruning every path where no completion can be within max_distance.
+            Returns a list of (word, distance, ordinal)
+        """
+        found = []
+        too_far = max_distance + 1  # every distance above max_distance is the same to the walk
+        # the rows of the edit distance table are the states of the automaton. There are few of them, many paths pass
+        # through the same ones, so the transitions are computed once per state and letter
+        transitions = {}
+        nodes = [(self.root, "", tuple(min(column, too_far) for column in range(len(word) + 1)))]
+        while nodes:
+            (node, prefix, previous_row) = nodes.pop()
+            depth = len(prefix) + 1
+            # all letters not in the query near this depth give the same row. Once it is too far, as it is beyond
+            # the first few letters, only the edges of the letters in the query are walked
+            band_letters = word[max(0, depth - too_far):depth + max_distance]
+            other_letter_transition = self._transition(transitions, word, previous_row, None, depth, too_far)
+            if other_letter_transition[1] < too_far:
+                letters = node.edges.keys()
+            else:
+                letters = set(band_letters).intersection(node.edges)
+            for letter in letters:
+                child = node.edges[letter]
+                (row, distance) = self._transition(transitions, word, previous_row, letter, depth, too_far) if letter in band_letters else other_letter_transition
+                if child.final and row[-1] < too_far:
+                    found.append((prefix + letter, row[-1]))
+                if distance < too_far and child.edges:
+                    nodes.append((child, prefix + letter, row))
+        # the ordinals are counted for the few words found only, instead of along every path walked
+        return [(found_word, distance, self.index(found_word)) for (found_word, distance) in found]
+
+    @staticmethod
+    def _transition(transitions, word, previous_row, letter, depth, too_far):
+        # returns the next row and its least distance
+        key = (previous_row, letter, depth)
+        if key not in transitions:
+            # only the band of columns within too_far of the diagonal is computed, the cells outside of it are too far anyway
+            row = [too_far] * len(previous_row)
+            if depth < too_far:
+                row[0] = depth
+            for column in range(max(1, depth - too_far + 1), min(len(word), depth + too_far - 1) + 1):
+                cost = previous_row[column - 1] + (word[column - 1] != letter)  # replace
+                if previous_row[column] < cost:
+                    cost = previous_row[column] + 1  # delete
+                if row[column - 1] < cost:
+                    cost = row[column - 1] + 1  # insert
+                if cost < too_far:
+                    row[column] = cost
+            transitions[key] = (tuple(row), min(row))
+        return transitions[key]
+
+    def node_count(self):
+        return len(self.nodes) + 1
+
+    def edge_count(self):
+        return sum(len(node.edges) for node in self.nodes) + len(self.root.edges)
+
+    def __len__(self):
+        return self.size
+
+
+def default_max_distance(name_part: str):
+    # short name parts must be near exact, otherwise almost every other short token is within reach
+    if len(name_part) <= 4:
+        return 1
+    return 2
+
+
+def compute_dawg_lookup_table(id_to_name, stop_words, business_entity_type_names=None):
+    """
+        Computation of a minimized word graph over all distinct normalized name parts, and a list of (list-entry, name part, alias)
+        per name part, one element per alias having the name part, indexed by the name part's ordinal in the graph.
+        For entities, pass business_entity_type_names to leave legal forms like "inc" and "ltd" out, like in the phonetic bins
+    """
+    token_to_id = {}
+    for reference, list_subject in id_to_name.items():
+        (aliases, birthdates) = list_subject
+        for alias in aliases:
+            for name_part in normalizer.normalize_name_alias(alias, business_entity_type_names):
+                if len(name_part) < 2 or name_part in stop_words:
+                    continue
+
+                if name_part not in token_to_id:
+                    token_to_id[name_part] = []
+                token_to_id[name_part].append((reference, name_part, alias))
+
+    tokens = sorted(token_to_id.keys())
+    graph = Dawg(tokens)
+    ordinal_to_id = [token_to_id[token] for token in tokens]
+    return (graph, ordinal_to_id)
+
+
+def find_dawg_candidates(name_parts, graph, ordinal_to_id, max_distance=None):
+    """
+        Returns a dict of list-entry reference to the set of (query name part, list name part) pairs that are within max_distance
+    """
+    candidates = {}
+    for name_part in name_parts:
+        name_part_max_distance = max_distance if max_distance is not None else default_max_distance(name_part)
+        for (candidate_name_part, distance, ordinal) in graph.fuzzy_find(name_part, name_part_max_distance):
+            for (reference, list_name_part, alias) in ordinal_to_id[ordinal]:
+                if reference not in candidates:
+                    candidates[reference] = set()
+                candidates[reference].add((name_part, candidate_name_part))
+    return candidates
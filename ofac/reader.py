@@ -3,33 +3,26 @@ import argparse
 import csv
 import io
 import sys
-import sdn as parser
-from timeit import default_timer as timer
+import normalizer
 from dataobjects import NamePart
 from dataobjects import NameAlias
+from dataobjects import BirthdateInterval
 from datetime import datetime
 
 
+FIRST_NAME_PART_TYPES = {1521, 1522}  # NamePartTypeID of First Name and Middle Name, last name is 1520
+
+
 def extract_dates(DatePeriod):
+    """
+        A date period is a range from the earliest possible start to the latest possible end.
+        All four dates are equal for an exact date, a year-only date runs from the 1st of January to the 31st of December.
+    """
     start_date_from = create_single_date(DatePeriod.Start.From)
-    start_date_to = create_single_date(DatePeriod.Start.To)
-
-    end_date_from = create_single_date(DatePeriod.End.From)
     end_date_to = create_single_date(DatePeriod.End.To)
-
-    if start_date_from == start_date_to:
-        if end_date_from == end_date_to:
-            if start_date_from == end_date_from:
-                return start_date_from  # all values equal, this is a single exact date
-            else:
-                # TODO ranges not supported
-                return None  # (start_date_from, end_date_from) # equal pairs
-    else:
-        # TODO ranges not supported
-        # what is this case supposed to represent? that the whole year is included?
-        # values = [start_date_from, start_date_to, end_date_to, end_date_from]
-        # return tuple(values)
-        return None
+    if end_date_to < start_date_from:
+        return None  # invalid period
+    return BirthdateInterval(start_date_from, end_date_to)
 
 
 def create_single_date(date):
@@ -44,11 +37,13 @@ def create_single_date(date):
 
 
 def load_sdn_sanctions(sdn_filename='sdn_advanced_2024.xml'):
+    import sdn as parser  # the generated parser is slow to import, only import it when a list file is parsed
     sdn_list = parser.parse(sdn_filename, silence=True)
     return load_sanctions(sdn_list)
 
 
 def load_consolidated_sanctions(cons_filename='cons_advanced.xml'):
+    import sdn as parser  # the generated parser is slow to import, only import it when a list file is parsed
     consolidated_list = parser.parse(cons_filename, silence=True)
     return load_sanctions(consolidated_list)
 
@@ -74,6 +69,12 @@ def load_sanctions(sanction_list):
                         for period in version.DatePeriod:
                             date_aliases.append(period)
             for identity in profile.Identity:
+                name_part_types = {}  # name part group id -> name part type id
+                if identity.NamePartGroups:
+                    for master_group in identity.NamePartGroups.MasterNamePartGroup:
+                        for group in master_group.NamePartGroup:
+                            name_part_types[group.ID] = group.NamePartTypeID
+
                 for alias in identity.Alias:
                     if alias.LowQuality == False:  # TODO include the low quality aliases as well, but mark then accordingly
                         for name in alias.DocumentedName:
@@ -82,20 +83,29 @@ def load_sanctions(sanction_list):
                                 namepart_value = namepart.NamePartValue
                                 if namepart_value.ScriptID == 215:  # our input is latin only, so we match against latin only
                                     namevalue = namepart_value.valueOf_
-                                    parts.append(namevalue)
+                                    is_firstname = name_part_types.get(namepart_value.NamePartGroupID) in FIRST_NAME_PART_TYPES
+                                    parts.append((namevalue, is_firstname))
                             if parts:
-                                name_parts = [NamePart(p) for p in parts]
+                                name_parts = [NamePart(p, is_firstname) for (p, is_firstname) in parts]
                                 name_aliases.append((NameAlias(name_parts)))
 
         if name_aliases:
             if profile.PartySubTypeID == 4:  # person
                 dates = [extract_dates(d) for d in date_aliases if d]
+                dates = [d for d in dates if d]
 
                 id_to_name_persons[party.FixedRef] = (name_aliases, dates)
             else:  # not a person, type 3 is a company
                 id_to_name_entities[party.FixedRef] = (name_aliases, [])
                 for name in name_aliases:
-                    entity_name_to_id_map[str(name)] = party.FixedRef
+                    name_key = normalizer.normalize_name_key(name)
+                    if not name_key:
+                        continue
+                    # several parties can share a name, and more so as casing and word order are ignored
+                    if name_key not in entity_name_to_id_map:
+                        entity_name_to_id_map[name_key] = []
+                    if party.FixedRef not in entity_name_to_id_map[name_key]:
+                        entity_name_to_id_map[name_key].append(party.FixedRef)
 
     return (id_to_name_persons, id_to_name_entities, entity_name_to_id_map)
 
@@ -137,8 +147,9 @@ def execute_test_queries(name_to_id_map, sentry_entity_filename, output_file_pat
     matches = []
     print("Searching for {} test-subjects read from file '{}'".format(test_subject_count, sentry_entity_filename))
     for (id, name, organization_id) in test_subjects:
-        if name in name_to_id_map.keys():
-            matches.append((id, name, organization_id, name_to_id_map[name]))
+        name_key = normalizer.normalize_name_key(NameAlias([NamePart(name)]))  # same key as the list aliases, ignores casing and word order
+        for sdn_id in name_to_id_map.get(name_key, []):
+            matches.append((id, name, organization_id, sdn_id))
 
     print("id, name, organization_id, sdn_id")
     for match in matches:
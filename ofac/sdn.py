@@ -535,6 +535,8 @@ def get_all_text_(node):
 
 
 def find_attr_value_(attr_name, node):
+    if ':' not in attr_name:
+        return node.attrib.get(attr_name)  # fast path, no namespace prefix to look up
     attrs = node.attrib
     attr_parts = attr_name.split(':')
     value = None
@@ -552,6 +554,27 @@ class GDSParseError(Exception):
     pass
 
 
+def build_children_from_table_(obj, node, child_classes):
+    # Fast path for the build method of the classes read by load_sanctions in reader.py, looking up the child
+    # elements in a table of tag name -> (class, True for a list of children) instead of the if/elif chain of
+    # buildChildren. Tags not in the table still go through buildChildren.
+    for child in node:
+        tag = child.tag
+        nodeName_ = tag[tag.rfind('}') + 1:]  # same as Tag_pattern_, without the regular expression
+        entry = child_classes.get(nodeName_)
+        if entry is None:
+            obj.buildChildren(child, node, nodeName_)
+            continue
+        (class_, is_list) = entry
+        obj_ = class_.factory()
+        obj_.build(child)
+        if is_list:
+            getattr(obj, nodeName_).append(obj_)
+        else:
+            setattr(obj, nodeName_, obj_)
+        obj_.original_tagname_ = nodeName_
+
+
 def raise_parse_error(node, msg):
     msg = '%s (element %s/line %d)' % (msg, node.tag, node.sourceline, )
     raise GDSParseError(msg)
@@ -3446,9 +3469,7 @@ class DistinctPartySchemaType(GeneratedsSuper):
     def build(self, node):
         already_processed = set()
         self.buildAttributes(node, node.attrib, already_processed)
-        for child in node:
-            nodeName_ = Tag_pattern_.match(child.tag).groups()[-1]
-            self.buildChildren(child, node, nodeName_)
+        build_children_from_table_(self, node, self.child_classes_)
         return self
     def buildAttributes(self, node, attrs, already_processed):
         value = find_attr_value_('FixedRef', node)
@@ -3580,9 +3601,7 @@ class FeatureSchemaType(GeneratedsSuper):
     def build(self, node):
         already_processed = set()
         self.buildAttributes(node, node.attrib, already_processed)
-        for child in node:
-            nodeName_ = Tag_pattern_.match(child.tag).groups()[-1]
-            self.buildChildren(child, node, nodeName_)
+        build_children_from_table_(self, node, self.child_classes_)
         return self
     def buildAttributes(self, node, attrs, already_processed):
         value = find_attr_value_('ID', node)
@@ -3752,9 +3771,7 @@ class IdentitySchemaType(GeneratedsSuper):
     def build(self, node):
         already_processed = set()
         self.buildAttributes(node, node.attrib, already_processed)
-        for child in node:
-            nodeName_ = Tag_pattern_.match(child.tag).groups()[-1]
-            self.buildChildren(child, node, nodeName_)
+        build_children_from_table_(self, node, self.child_classes_)
         return self
     def buildAttributes(self, node, attrs, already_processed):
         value = find_attr_value_('ID', node)
@@ -3947,9 +3964,7 @@ class DocumentedNameSchemaType(GeneratedsSuper):
     def build(self, node):
         already_processed = set()
         self.buildAttributes(node, node.attrib, already_processed)
-        for child in node:
-            nodeName_ = Tag_pattern_.match(child.tag).groups()[-1]
-            self.buildChildren(child, node, nodeName_)
+        build_children_from_table_(self, node, self.child_classes_)
         return self
     def buildAttributes(self, node, attrs, already_processed):
         value = find_attr_value_('ID', node)
@@ -13964,9 +13979,7 @@ class ProfileType(GeneratedsSuper):
     def build(self, node):
         already_processed = set()
         self.buildAttributes(node, node.attrib, already_processed)
-        for child in node:
-            nodeName_ = Tag_pattern_.match(child.tag).groups()[-1]
-            self.buildChildren(child, node, nodeName_)
+        build_children_from_table_(self, node, self.child_classes_)
         return self
     def buildAttributes(self, node, attrs, already_processed):
         value = find_attr_value_('ID', node)
@@ -15199,9 +15212,7 @@ class AliasType3(GeneratedsSuper):
     def build(self, node):
         already_processed = set()
         self.buildAttributes(node, node.attrib, already_processed)
-        for child in node:
-            nodeName_ = Tag_pattern_.match(child.tag).groups()[-1]
-            self.buildChildren(child, node, nodeName_)
+        build_children_from_table_(self, node, self.child_classes_)
         return self
     def buildAttributes(self, node, attrs, already_processed):
         value = find_attr_value_('FixedRef', node)
@@ -16542,6 +16553,41 @@ class TextType(GeneratedsSuper):
 # end class TextType
 
 
+# child element tables of the classes read by load_sanctions, see build_children_from_table_
+DistinctPartySchemaType.child_classes_ = {
+    'Comment': (Comment, True),
+    'Profile': (ProfileType, True),
+}
+ProfileType.child_classes_ = {
+    'Comment': (Comment, True),
+    'Identity': (IdentitySchemaType, True),
+    'Feature': (FeatureSchemaType, True),
+    'SanctionsEntryReference': (SanctionsEntryReferenceType, True),
+    'ExternalReference': (ExternalReferenceType, True),
+}
+IdentitySchemaType.child_classes_ = {
+    'Comment': (Comment, False),
+    'Alias': (AliasType3, True),
+    'NamePartGroups': (NamePartGroupsType, False),
+    'IDRegDocumentReference': (IDRegDocumentReference, True),
+}
+AliasType3.child_classes_ = {
+    'Comment': (Comment, False),
+    'DatePeriod': (DatePeriod, False),
+    'DocumentedName': (DocumentedNameSchemaType, True),
+}
+DocumentedNameSchemaType.child_classes_ = {
+    'Comment': (Comment, False),
+    'DocumentedNamePart': (DocumentedNamePartType, True),
+    'DocumentedNameCountry': (DocumentedNameCountryType, True),
+    'IDRegDocumentReference': (IDRegDocumentReference, True),
+}
+FeatureSchemaType.child_classes_ = {
+    'FeatureVersion': (FeatureVersionType, True),
+    'IdentityReference': (IdentityReferenceType, True),
+}
+
+
 GDSClassesMapping = {
 }
 
@@ -0,0 +1,138 @@
+import io
+import json
+import time
+from timeit import default_timer as timer
+
+
+class SearchTrace:
+    """
+        Stage durations and counts of one search() call. search() only creates one when given a trace sink,
+        so searches without a sink pay for nothing but a None check per stage.
+    """
+
+    def __init__(self, name_string, sink):
+        self.name_string = name_string
+        self.sink = sink
+        self.start = timer()
+        self.last = self.start
+        self.stages = []  # (stage name, seconds), in the order they ran
+        self.counts = {}
+        self.name_parts = None
+        self.bins = None
+        self.bin_postings = {}  # bin -> postings scanned in it
+        self.exit = None  # the stage search() returned from
+        self.result_count = 0
+        self.total_seconds = 0.0
+
+    def stage(self, name):
+        """
+            Ends the stage called name, it is timed from the end of the previous stage
+        """
+        now = timer()
+        self.stages.append((name, now - self.last))
+        self.last = now
+
+    def count(self, name, n=1):
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def postings(self, bin, n):
+        """
+            Counts a bin hit with n postings, per bin too, the large bins are what makes searches slow
+        """
+        self.count("bins hit")
+        self.count("postings scanned", n)
+        self.bin_postings[bin] = self.bin_postings.get(bin, 0) + n
+
+    def finish(self, exit, results):
+        self.exit = exit
+        self.result_count = len(results)
+        self.total_seconds = timer() - self.start
+        self.sink(self)
+
+
+class StageTotals:
+    """
+        Trace sink summing up the stage durations and counts over many searches
+    """
+
+    def __init__(self):
+        self.searches = 0
+        self.total_seconds = 0.0
+        self.stage_seconds = {}
+        self.counts = {}
+        self.exits = {}
+
+    def __call__(self, trace):
+        self.searches += 1
+        self.total_seconds += trace.total_seconds
+        for (name, seconds) in trace.stages:
+            self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + seconds
+        for name, n in trace.counts.items():
+            self.counts[name] = self.counts.get(name, 0) + n
+        self.exits[trace.exit] = self.exits.get(trace.exit, 0) + 1
+
+    def print_summary(self, subjectType):
+        if not self.searches:
+            return
+        print("Search stages for subject type {}, {} searches, {:.3f} ms per search:".format(
+            subjectType, self.searches, 10 ** 3 * self.total_seconds / self.searches))
+        for name, seconds in self.stage_seconds.items():
+            print("    {:24s} {:8.3f} ms per search, {:5.1f}%".format(
+                name, 10 ** 3 * seconds / self.searches, 100 * seconds / self.total_seconds if self.total_seconds else 0))
+        for name, n in self.counts.items():
+            print("    {:24s} {:8.1f} per search".format(name, n / self.searches))
+        print("    returned from: {}".format(", ".join("{} {}".format(exit, n) for exit, n in self.exits.items())))
+
+
+def bin_text(bin):
+    # the double metaphone bins are bytes
+    return bin.decode('ascii') if isinstance(bin, bytes) else bin
+
+
+class SlowQueryLog:
+    """
+        Trace sink writing the searches slower than threshold_seconds to a file, one JSON object per line, with the
+        normalized name parts, the bins and their postings, the candidate counts and the time spent per stage.
+        The fingerprint is the sorted name parts, equal for queries that are searched alike.
+    """
+
+    def __init__(self, filename, threshold_seconds=0.1):
+        self.filename = filename
+        self.threshold_seconds = threshold_seconds
+        self.logged = 0
+        self.log_file = io.open(filename, 'a', encoding='utf-8')
+
+    def __call__(self, trace):
+        if trace.total_seconds < self.threshold_seconds:
+            return
+        name_parts = sorted(trace.name_parts or [])
+        entry = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime()),
+            "query": trace.name_string,
+            "fingerprint": " ".join(name_parts),
+            "name_parts": name_parts,
+            "bins": sorted([bin_text(bin), name_part, trace.bin_postings.get(bin, 0)] for (bin, name_part) in (trace.bins or ())),
+            "counts": trace.counts,
+            "stages_ms": {name: round(10 ** 3 * seconds, 3) for (name, seconds) in trace.stages},
+            "total_ms": round(10 ** 3 * trace.total_seconds, 3),
+            "exit": trace.exit,
+            "results": trace.result_count,
+        }
+        self.log_file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.log_file.flush()  # readable while the run goes on
+        self.logged += 1
+
+    def close(self):
+        self.log_file.close()
+
+
+def fan_out(*sinks):
+    """
+        Trace sink passing each trace on to all of the given sinks, None for a sink is skipped
+    """
+    sinks = [s for s in sinks if s is not None]
+
+    def sink(trace):
+        for s in sinks:
+            s(trace)
+    return sink
@@ -0,0 +1,447 @@
+# Synthetic sanction list subjects and customers, for benchmarks and scale tests without the real list files and
+# customer exports. Everything is generated from a seed, so a run can be repeated exactly.
+
+import argparse
+import csv
+import io
+import random
+from datetime import date
+from timeit import default_timer as timer
+from xml.sax.saxutils import escape
+from xml.sax.saxutils import quoteattr
+
+from dataobjects import NameAlias
+from dataobjects import NamePart
+from dataobjects import BirthdateInterval
+
+# common names, drawn with Zipf-like weights, most frequent first
+FIRST_NAMES = ["mohammed", "ali", "john", "maria", "ahmed", "david", "anna", "abdul", "michael", "fatima", "ivan", "elena",
+               "omar", "peter", "olga", "hassan", "james", "sergei", "aisha", "jose", "yusuf", "li", "wei", "kim", "hussein",
+               "vladimir", "ibrahim", "robert", "natalia", "khalid", "thomas", "mustafa", "irina", "juan", "abdullah", "george"]
+LAST_NAMES = ["smith", "ali", "khan", "ivanov", "wang", "kim", "garcia", "hassan", "mohammed", "petrov", "lee", "al-rashid",
+              "rodriguez", "nguyen", "hussein", "popov", "chen", "mahmoud", "johnson", "kuznetsov", "abdullah", "park",
+              "lopez", "al-masri", "sokolov", "zhang", "ibrahim", "brown", "volkov", "rahman", "martinez", "haddad"]
+SYLLABLES = ["ka", "ri", "mo", "na", "lev", "sha", "dor", "ben", "tal", "zi", "ru", "mar", "ko", "vich", "sen", "ha", "lin",
+             "ab", "del", "ora", "an", "mir", "za", "gul", "ter", "os", "ni", "bak", "yev", "ra"]
+ENTITY_WORDS = ["trading", "shipping", "petroleum", "global", "holding", "import", "export", "industrial", "bank",
+                "investment", "marine", "energy", "group", "general", "international", "technology", "construction"]
+ENTITY_SUFFIXES = ["ltd", "llc", "co", "gmbh", "sa", "inc", "company", "limited", "corporation"]
+
+GENDERS = ["M", "F"]
+
+
+def zipf_cum_weights(count, exponent=1.1):
+    cum_weights = []
+    total = 0.0
+    for rank in range(1, count + 1):
+        total += 1.0 / rank ** exponent
+        cum_weights.append(total)
+    return cum_weights
+
+
+class NameGenerator:
+    """
+        Names with a realistic distribution: a few very common names, and a long tail of rare ones built from syllables
+    """
+
+    def __init__(self, seed=0, rare_name_rate=0.4):
+        self.rng = random.Random(seed)
+        self.rare_name_rate = rare_name_rate
+        self.first_name_weights = zipf_cum_weights(len(FIRST_NAMES))
+        self.last_name_weights = zipf_cum_weights(len(LAST_NAMES))
+
+    def rare_name(self):
+        return "".join(self.rng.choice(SYLLABLES) for _ in range(self.rng.randint(2, 4)))
+
+    def first_name(self):
+        if self.rng.random() < self.rare_name_rate:
+            return self.rare_name()
+        return self.rng.choices(FIRST_NAMES, cum_weights=self.first_name_weights)[0]
+
+    def last_name(self):
+        if self.rng.random() < self.rare_name_rate:
+            return self.rare_name()
+        return self.rng.choices(LAST_NAMES, cum_weights=self.last_name_weights)[0]
+
+    def person_name(self):
+        """
+            Returns (list of first names, last name), one in four persons has a middle name
+        """
+        first_names = [self.first_name()]
+        if self.rng.random() < 0.25:
+            first_names.append(self.first_name())
+        return (first_names, self.last_name())
+
+    def entity_name(self):
+        words = [self.rare_name()] + self.rng.sample(ENTITY_WORDS, self.rng.randint(1, 2))
+        if self.rng.random() < 0.7:
+            words.append(self.rng.choice(ENTITY_SUFFIXES))
+        return " ".join(words)
+
+    def birthdate(self):
+        return date(self.rng.randint(1940, 2000), self.rng.randint(1, 12), self.rng.randint(1, 28))
+
+    def misspell(self, name: str):
+        """
+            One random edit: a dropped, doubled, swapped or replaced letter, like a typo or another transliteration
+        """
+        if len(name) < 3:
+            return name
+        i = self.rng.randrange(1, len(name) - 1)
+        edit = self.rng.randrange(4)
+        if edit == 0:
+            return name[:i] + name[i + 1:]
+        if edit == 1:
+            return name[:i] + name[i] + name[i:]
+        if edit == 2:
+            return name[:i - 1] + name[i] + name[i - 1] + name[i + 1:]
+        return name[:i] + self.rng.choice("aeiouy") + name[i + 1:]
+
+
+def generate_list_records(person_count, entity_count, seed=0):
+    """
+        Yields the list subjects as plain records, one at a time, for writing list files of any size:
+        ("person", reference, list of (first names, last name) aliases, list of (first date, last date) birthdates, gender)
+        ("entity", reference, list of names, [], None)
+        Persons have one to three aliases, spelling variants of the first, and an exact, year-only or unknown birthdate.
+    """
+    names = NameGenerator(seed)
+    rng = names.rng
+    for i in range(person_count):
+        (first_names, last_name) = names.person_name()
+        aliases = [(first_names, last_name)]
+        for _ in range(rng.choice([0, 0, 1, 2])):
+            aliases.append(([names.misspell(n) for n in first_names], names.misspell(last_name)))
+
+        birthdate = names.birthdate()
+        kind = rng.random()
+        if kind < 0.6:
+            birthdates = [(birthdate, birthdate)]
+        elif kind < 0.8:
+            birthdates = [(date(birthdate.year, 1, 1), date(birthdate.year, 12, 31))]
+        elif kind < 0.85:
+            birthdates = [(date(birthdate.year - 2, 1, 1), date(birthdate.year + 2, 12, 31))]
+        else:
+            birthdates = []
+        yield ("person", "P{}".format(i), aliases, birthdates, rng.choice(GENDERS))
+
+    for i in range(entity_count):
+        name = names.entity_name()
+        aliases = [name]
+        if rng.random() < 0.3:
+            aliases.append(names.misspell(name))
+        yield ("entity", "E{}".format(i), aliases, [], None)
+
+
+def person_alias(first_names, last_name, gender=None):
+    return NameAlias([NamePart(first_name, True) for first_name in first_names] + [NamePart(last_name)], None, gender)
+
+
+def generate_list_subjects(person_count, entity_count, seed=0):
+    """
+        Returns (id_to_name_persons, id_to_name_entities) in the format of the readers' load_sanctions
+    """
+    id_to_name_persons = {}
+    id_to_name_entities = {}
+    for (subject_type, reference, aliases, birthdates, gender) in generate_list_records(person_count, entity_count, seed):
+        if subject_type == "person":
+            id_to_name_persons[reference] = ([person_alias(first_names, last_name, gender) for (first_names, last_name) in aliases],
+                                             [BirthdateInterval(start, end) for (start, end) in birthdates])
+        else:
+            id_to_name_entities[reference] = ([NameAlias([NamePart(name)]) for name in aliases], [])
+    return (id_to_name_persons, id_to_name_entities)
+
+
+def list_persons_of(id_to_name_persons):
+    """
+        The list persons as (first names, last name, birthdates, gender) for generate_customers, from the first alias of each
+    """
+    list_persons = []
+    for (aliases, birthdates) in id_to_name_persons.values():
+        alias = list(aliases)[0]
+        first_names = [n.part for n in alias.name_parts if n.is_firstname]
+        last_name = " ".join(n.part for n in alias.name_parts if not n.is_firstname)
+        list_persons.append((first_names, last_name, [(date.fromordinal(b.start), date.fromordinal(b.end)) for b in birthdates], alias.gender))
+    return list_persons
+
+
+def generate_customers(count, list_persons=None, near_duplicate_rate=0.01, seed=0):
+    """
+        Yields count customers as (firstname, lastname, birthdate, gender, id), birthdate as 'YYYY-MM-DD'.
+        A near_duplicate_rate share of them are list persons, given as (first names, last name, birthdates, gender),
+        half of those with a misspelled name, all with the birthdate and gender of the list person so that they stay
+        matches. The rest are random names that mostly should not match.
+    """
+    names = NameGenerator(seed + 1)
+    rng = names.rng
+    for i in range(count):
+        if list_persons and rng.random() < near_duplicate_rate:
+            (first_names, lastname, birthdates, gender) = rng.choice(list_persons)
+            firstname = " ".join(first_names)
+            if rng.random() < 0.5:
+                lastname = names.misspell(lastname)
+            if birthdates:
+                (start, end) = birthdates[0]
+                birthdate = date.fromordinal(rng.randint(start.toordinal(), end.toordinal())).isoformat()
+            else:
+                birthdate = names.birthdate().isoformat()
+            gender = gender or rng.choice(GENDERS)  # any gender matches a list person of unknown gender
+        else:
+            (first_names, lastname) = names.person_name()
+            firstname = " ".join(first_names)
+            birthdate = names.birthdate().isoformat()
+            gender = rng.choice(GENDERS)
+        yield (firstname, lastname, birthdate, gender, str(i))
+
+
+def birthdate_kind(start, end):
+    if start == end:
+        return "date"
+    if (start.month, start.day, end.month, end.day) == (1, 1, 12, 31):
+        return "year" if start.year == end.year else "years"
+    return None
+
+
+def write_eu_xml(filename, records):
+    """
+        Writes the records as an EU financial sanctions file, format 1.1 (eu/schema_1_1.xsd)
+    """
+    regulation_summary = '<regulationSummary regulationType="regulation" publicationDate="2020-01-01" numberTitle="2020/1"/>'
+    with io.open(filename, 'w', encoding='utf-8') as xml_file:
+        xml_file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        xml_file.write('<export xmlns="http://eu.europa.ec/fpi/fsd/export" generationDate="2020-01-01T00:00:00" globalFileId="1">\n')
+        logical_id = 0
+        for (subject_type, reference, aliases, birthdates, gender) in records:
+            logical_id += 1
+            xml_file.write('<sanctionEntity logicalId="{}">'.format(logical_id))
+            xml_file.write('<regulation regulationType="regulation" organisationType="commission" publicationDate="2020-01-01" '
+                           'entryIntoForceDate="2020-01-01" numberTitle="2020/1" programme="SYN" logicalId="1"/>')
+            if subject_type == "person":
+                xml_file.write('<subjectType code="person" classificationCode="P"/>')
+                for (first_names, last_name) in aliases:
+                    logical_id += 1
+                    middle_name = ' middleName={}'.format(quoteattr(" ".join(first_names[1:]))) if len(first_names) > 1 else ''
+                    xml_file.write('<nameAlias firstName={}{} lastName={} wholeName={} gender="{}" strong="true" '
+                                   'regulationLanguage="en" logicalId="{}">{}</nameAlias>'.format(
+                                       quoteattr(first_names[0]), middle_name, quoteattr(last_name),
+                                       quoteattr(" ".join(first_names + [last_name])), gender, logical_id, regulation_summary))
+                for (start, end) in birthdates:
+                    kind = birthdate_kind(start, end)
+                    if kind == "date":
+                        date_attributes = 'birthdate="{}"'.format(start.isoformat())
+                    elif kind == "year":
+                        date_attributes = 'year="{}"'.format(start.year)
+                    else:
+                        date_attributes = 'yearRangeFrom="{}" yearRangeTo="{}"'.format(start.year, end.year)
+                    logical_id += 1
+                    xml_file.write('<birthdate {} calendarType="GREGORIAN" countryIso2Code="00" countryDescription="UNKNOWN" '
+                                   'regulationLanguage="en" logicalId="{}">{}</birthdate>'.format(date_attributes, logical_id, regulation_summary))
+            else:
+                xml_file.write('<subjectType code="enterprise" classificationCode="E"/>')
+                for name in aliases:
+                    logical_id += 1
+                    xml_file.write('<nameAlias wholeName={} strong="true" regulationLanguage="en" logicalId="{}">{}</nameAlias>'.format(
+                        quoteattr(name), logical_id, regulation_summary))
+            xml_file.write('</sanctionEntity>\n')
+        xml_file.write('</export>\n')
+
+
+def write_un_xml(filename, records):
+    """
+        Writes the records as a UN consolidated list (un/sc-sanctions.xsd). All individuals are written before the entities,
+        as the format requires, so the entity records are held back until the individuals are done.
+    """
+    entities = []
+    with io.open(filename, 'w', encoding='utf-8') as xml_file:
+        xml_file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        xml_file.write('<CONSOLIDATED_LIST dateGenerated="2020-01-01T00:00:00.000-00:00">\n<INDIVIDUALS>\n')
+        data_id = 0
+        for (subject_type, reference, aliases, birthdates, gender) in records:
+            if subject_type != "person":
+                entities.append((reference, aliases))
+                continue
+
+            data_id += 1
+            (first_names, last_name) = aliases[0]
+            other_names = first_names[1:] + [last_name]
+            xml_file.write('<INDIVIDUAL><DATAID>{}</DATAID><VERSIONNUM>1</VERSIONNUM><FIRST_NAME>{}</FIRST_NAME>'.format(data_id, escape(first_names[0])))
+            for element, name in zip(("SECOND_NAME", "THIRD_NAME", "FOURTH_NAME"), other_names):
+                xml_file.write('<{0}>{1}</{0}>'.format(element, escape(name)))
+            xml_file.write('<UN_LIST_TYPE>SYN</UN_LIST_TYPE><REFERENCE_NUMBER>{}</REFERENCE_NUMBER><LISTED_ON>2020-01-01</LISTED_ON>'
+                           '<GENDER>{}</GENDER><COMMENTS1/><LIST_TYPE><VALUE>UN List</VALUE></LIST_TYPE>'.format(
+                               escape(reference), "Male" if gender == "M" else "Female"))
+            for (alias_first_names, alias_last_name) in aliases[1:]:
+                xml_file.write('<INDIVIDUAL_ALIAS><QUALITY>Good</QUALITY><ALIAS_NAME>{}</ALIAS_NAME></INDIVIDUAL_ALIAS>'.format(
+                    escape(" ".join(alias_first_names + [alias_last_name]))))
+            if len(aliases) == 1:
+                xml_file.write('<INDIVIDUAL_ALIAS><QUALITY/><ALIAS_NAME/></INDIVIDUAL_ALIAS>')  # at least one is required, as in the real list
+            xml_file.write('<INDIVIDUAL_ADDRESS><COUNTRY/></INDIVIDUAL_ADDRESS>')
+            for (start, end) in birthdates:
+                kind = birthdate_kind(start, end)
+                if kind == "date":
+                    xml_file.write('<INDIVIDUAL_DATE_OF_BIRTH><TYPE_OF_DATE>EXACT</TYPE_OF_DATE><DATE>{}</DATE></INDIVIDUAL_DATE_OF_BIRTH>'.format(start.isoformat()))
+                elif kind == "year":
+                    xml_file.write('<INDIVIDUAL_DATE_OF_BIRTH><TYPE_OF_DATE>EXACT</TYPE_OF_DATE><YEAR>{}</YEAR></INDIVIDUAL_DATE_OF_BIRTH>'.format(start.year))
+                elif kind == "years":
+                    xml_file.write('<INDIVIDUAL_DATE_OF_BIRTH><TYPE_OF_DATE>BETWEEN</TYPE_OF_DATE><FROM_YEAR>{}</FROM_YEAR><TO_YEAR>{}</TO_YEAR>'
+                                   '</INDIVIDUAL_DATE_OF_BIRTH>'.format(start.year, end.year))
+            if not birthdates:
+                xml_file.write('<INDIVIDUAL_DATE_OF_BIRTH/>')
+            xml_file.write('<INDIVIDUAL_PLACE_OF_BIRTH/><INDIVIDUAL_DOCUMENT/><SORT_KEY/><SORT_KEY_LAST_MOD/></INDIVIDUAL>\n')
+
+        xml_file.write('</INDIVIDUALS>\n<ENTITIES>\n')
+        for (reference, aliases) in entities:
+            data_id += 1
+            xml_file.write('<ENTITY><DATAID>{}</DATAID><VERSIONNUM>1</VERSIONNUM><FIRST_NAME>{}</FIRST_NAME><UN_LIST_TYPE>SYN</UN_LIST_TYPE>'
+                           '<REFERENCE_NUMBER>{}</REFERENCE_NUMBER><LISTED_ON>2020-01-01</LISTED_ON><COMMENTS1/>'
+                           '<LIST_TYPE><VALUE>UN List</VALUE></LIST_TYPE>'.format(data_id, escape(aliases[0]), escape(reference)))
+            for name in aliases[1:]:
+                xml_file.write('<ENTITY_ALIAS><QUALITY>Good</QUALITY><ALIAS_NAME>{}</ALIAS_NAME></ENTITY_ALIAS>'.format(escape(name)))
+            if len(aliases) == 1:
+                xml_file.write('<ENTITY_ALIAS><QUALITY/><ALIAS_NAME/></ENTITY_ALIAS>')
+            xml_file.write('<ENTITY_ADDRESS/><SORT_KEY/><SORT_KEY_LAST_MOD/></ENTITY>\n')
+        xml_file.write('</ENTITIES>\n</CONSOLIDATED_LIST>\n')
+
+
+# reference values of the OFAC advanced format used by the synthetic files, with the IDs ofac/reader.py expects
+OFAC_REFERENCE_VALUES = {
+    "AliasTypeValues": '<AliasType ID="1403">Name</AliasType>',
+    "CalendarTypeValues": '<CalendarType ID="1">Gregorian</CalendarType>',
+    "DocNameStatusValues": '<DocNameStatus ID="1">First Language</DocNameStatus>',
+    "FeatureTypeValues": '<FeatureType ID="8" FeatureTypeGroupID="1">Birthdate</FeatureType>',
+    "FeatureTypeGroupValues": '<FeatureTypeGroup ID="1">Entity Information</FeatureTypeGroup>',
+    "IdentityFeatureLinkTypeValues": '<IdentityFeatureLinkType ID="1">Identifying Information</IdentityFeatureLinkType>',
+    "NamePartTypeValues": '<NamePartType ID="1520">Last Name</NamePartType><NamePartType ID="1521">First Name</NamePartType>'
+                          '<NamePartType ID="1522">Middle Name</NamePartType><NamePartType ID="1525">Entity Name</NamePartType>',
+    "PartySubTypeValues": '<PartySubType ID="3" PartyTypeID="2">Unknown</PartySubType><PartySubType ID="4" PartyTypeID="1">Unknown</PartySubType>',
+    "PartyTypeValues": '<PartyType ID="1">Individual</PartyType><PartyType ID="2">Entity</PartyType>',
+    "ReliabilityValues": '<Reliability ID="1560">Reliable</Reliability><Reliability ID="1561">False</Reliability>',
+    "ScriptValues": '<Script ID="215" ScriptCode="Latn">Latin</Script>',
+    "ScriptStatusValues": '<ScriptStatus ID="1">Unknown</ScriptStatus>',
+}
+# all reference value sets, in schema order, each one is required even when empty
+OFAC_REFERENCE_VALUE_SETS = ["AliasTypeValues", "AreaCodeValues", "AreaCodeTypeValues", "CalendarTypeValues", "CountryValues",
+                             "CountryRelevanceValues", "DecisionMakingBodyValues", "DetailReferenceValues", "DetailTypeValues",
+                             "DocNameStatusValues", "EntryEventTypeValues", "EntryLinkTypeValues", "ExRefTypeValues", "FeatureTypeValues",
+                             "FeatureTypeGroupValues", "IDRegDocDateTypeValues", "IDRegDocTypeValues", "IdentityFeatureLinkTypeValues",
+                             "LegalBasisValues", "LegalBasisTypeValues", "ListValues", "LocPartTypeValues", "LocPartValueStatusValues",
+                             "LocPartValueTypeValues", "NamePartTypeValues", "OrganisationValues", "PartySubTypeValues", "PartyTypeValues",
+                             "RelationQualityValues", "RelationTypeValues", "ReliabilityValues", "SanctionsProgramValues",
+                             "SanctionsTypeValues", "ScriptValues", "ScriptStatusValues", "SubsidiaryBodyValues", "SupInfoTypeValues",
+                             "TargetTypeValues", "ValidityValues"]
+
+
+def ofac_date_point(element, day):
+    return '<{0}><Year>{1}</Year><Month>{2}</Month><Day>{3}</Day></{0}>'.format(element, day.year, day.month, day.day)
+
+
+def write_ofac_xml(filename, records):
+    """
+        Writes the records as an OFAC advanced sanctions list (ofac/sdn_advanced.xsd)
+    """
+    with io.open(filename, 'w', encoding='utf-8') as xml_file:
+        xml_file.write('<?xml version="1.0" encoding="utf-8"?>\n')
+        xml_file.write('<Sanctions xmlns="http://www.un.org/sanctions/1.0" Version="1">\n')
+        xml_file.write('<DateOfIssue CalendarTypeID="1"><Year>2020</Year><Month>1</Month><Day>1</Day></DateOfIssue>\n<ReferenceValueSets>')
+        for value_set in OFAC_REFERENCE_VALUE_SETS:
+            xml_file.write('<{0}>{1}</{0}>'.format(value_set, OFAC_REFERENCE_VALUES.get(value_set, "")))
+        xml_file.write('</ReferenceValueSets>\n<Locations/>\n<IDRegDocuments/>\n<DistinctParties>\n')
+
+        next_id = 0  # one sequence for all IDs, which keeps them unique within every kind of element
+        for (subject_type, reference, aliases, birthdates, gender) in records:
+            next_id += 1
+            fixed_ref = str(next_id)
+            identity_id = next_id
+            if subject_type == "person":
+                group_ids = {1521: next_id + 1, 1522: next_id + 2, 1520: next_id + 3}  # first, middle and last name
+                next_id += 3
+                name_parts = [[(group_ids[1521], first_names[0])] + [(group_ids[1522], n) for n in first_names[1:]] + [(group_ids[1520], last_name)]
+                              for (first_names, last_name) in aliases]
+            else:
+                group_ids = {1525: next_id + 1}
+                next_id += 1
+                name_parts = [[(group_ids[1525], name)] for name in aliases]
+
+            xml_file.write('<DistinctParty FixedRef="{0}"><Profile ID="{0}" PartySubTypeID="{1}">'.format(fixed_ref, 4 if subject_type == "person" else 3))
+            xml_file.write('<Identity ID="{}" FixedRef="{}" Primary="true" False="false">'.format(identity_id, fixed_ref))
+            for i, parts in enumerate(name_parts):
+                next_id += 1
+                xml_file.write('<Alias FixedRef="{}" AliasTypeID="1403" Primary="{}" LowQuality="false">'.format(fixed_ref, "true" if i == 0 else "false"))
+                xml_file.write('<DocumentedName ID="{}" FixedRef="{}" DocNameStatusID="1">'.format(next_id, fixed_ref))
+                for (group_id, value) in parts:
+                    xml_file.write('<DocumentedNamePart><NamePartValue NamePartGroupID="{}" ScriptID="215" ScriptStatusID="1" Acronym="false">{}'
+                                   '</NamePartValue></DocumentedNamePart>'.format(group_id, escape(value)))
+                xml_file.write('</DocumentedName></Alias>')
+            xml_file.write('<NamePartGroups>')
+            for name_part_type_id, group_id in group_ids.items():
+                xml_file.write('<MasterNamePartGroup><NamePartGroup ID="{}" NamePartTypeID="{}"/></MasterNamePartGroup>'.format(group_id, name_part_type_id))
+            xml_file.write('</NamePartGroups></Identity>')
+
+            for (start, end) in birthdates:
+                fixed = 'YearFixed="false" MonthFixed="false" DayFixed="false"'
+                xml_file.write('<Feature ID="{}" FeatureTypeID="8"><FeatureVersion ID="{}" ReliabilityID="1560">'.format(next_id + 1, next_id + 2))
+                xml_file.write('<DatePeriod CalendarTypeID="1" {}>'.format(fixed))
+                for (element, day) in (("Start", start), ("End", end)):
+                    xml_file.write('<{0} Approximate="false" {1}>{2}{3}</{0}>'.format(element, fixed, ofac_date_point("From", day), ofac_date_point("To", day)))
+                xml_file.write('</DatePeriod></FeatureVersion><IdentityReference IdentityID="{}" IdentityFeatureLinkTypeID="1"/></Feature>'.format(identity_id))
+                next_id += 2
+            xml_file.write('</Profile></DistinctParty>\n')
+
+        xml_file.write('</DistinctParties>\n<ProfileRelationships/>\n<SanctionsEntries/>\n<SanctionsEntryLinks/>\n</Sanctions>\n')
+
+
+def write_customers_csv(filename, customers):
+    """
+        Writes customers from generate_customers with all the columns the searchers' import_test_subjects read
+    """
+    with io.open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+        csv_writer = csv.writer(csvfile, delimiter=';')
+        csv_writer.writerow(["id", "firstname", "lastname", "birthdate", "gender", "customer_type", "subscription_cost_usd"])
+        for (firstname, lastname, birthdate, gender, id) in customers:
+            csv_writer.writerow([id, firstname, lastname, birthdate, gender, "individual", "0"])
+
+
+def sample_list_persons(records, sample, sample_size, seed=0):
+    """
+        Passes the records through, keeping a uniform sample of the persons in sample, as (first names, last name, birthdates,
+        gender) for generate_customers. Reservoir sampling, so the list file can be written without holding all records.
+    """
+    rng = random.Random(seed + 2)
+    count = 0
+    for record in records:
+        (subject_type, reference, aliases, birthdates, gender) = record
+        if subject_type == "person":
+            (first_names, last_name) = aliases[0]
+            count += 1
+            if len(sample) < sample_size:
+                sample.append((first_names, last_name, birthdates, gender))
+            else:
+                i = rng.randrange(count)
+                if i < sample_size:
+                    sample[i] = (first_names, last_name, birthdates, gender)
+        yield record
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Write synthetic sanction list files and a customer file for scale tests")
+    arg_parser.add_argument("--format", choices=["eu", "un", "ofac"], required=True, help="Sanction list file format")
+    arg_parser.add_argument("--persons", type=int, default=10000)
+    arg_parser.add_argument("--entities", type=int, default=1000)
+    arg_parser.add_argument("--customers", type=int, default=10000)
+    arg_parser.add_argument("--near-duplicate-rate", type=float, default=0.01, help="Share of customers that are list persons, some misspelled")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--list-file", help="Output list file, default synthetic_<format>.xml")
+    arg_parser.add_argument("--customer-file", default="synthetic_customers.csv")
+    args = arg_parser.parse_args()
+
+    list_filename = args.list_file or "synthetic_{}.xml".format(args.format)
+    writers = {"eu": write_eu_xml, "un": write_un_xml, "ofac": write_ofac_xml}
+    start = timer()
+    list_persons = []
+    records = sample_list_persons(generate_list_records(args.persons, args.entities, args.seed), list_persons, 100000, args.seed)
+    writers[args.format](list_filename, records)
+    print("Wrote {} persons and {} entities to '{}' in {:.1f}s".format(args.persons, args.entities, list_filename, timer() - start))
+
+    start = timer()
+    write_customers_csv(args.customer_file, generate_customers(args.customers, list_persons, args.near_duplicate_rate, args.seed))
+    print("Wrote {} customers to '{}' in {:.1f}s".format(args.customers, args.customer_file, timer() - start))
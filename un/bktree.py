@@ -0,0 +1,101 @@
+from Levenshtein import distance as levenshtein_distance
+
+import normalizer
+
+
+class BKTree:
+    """
+        Burkhard-Keller tree over words, keyed by Levenshtein distance.
+        Each node is a (word, children) tuple, where children maps an edit distance to a child node.
+    """
+
+    def __init__(self, words=None):
+        self.root = None
+        self.size = 0
+        for word in words or []:
+            self.add(word)
+
+    def add(self, word: str):
+        if self.root is None:
+            self.root = (word, {})
+            self.size = 1
+            return
+
+        node = self.root
+        while True:
+            (node_word, children) = node
+            distance = levenshtein_distance(word, node_word)
+            if distance == 0:
+                return  # already in the tree
+            child = children.get(distance)
+            if child is None:
+                children[distance] = (word, {})
+                self.size += 1
+                return
+            node = child
+
+    def find(self, word: str, radius: int):
+        """
+            Returns a list of (distance, word) for all words in the tree within the given edit distance
+        """
+        found = []
+        if self.root is None:
+            return found
+
+        nodes = [self.root]
+        while nodes:
+            (node_word, children) = nodes.pop()
+            distance = levenshtein_distance(word, node_word)
+            if distance <= radius:
+                found.append((distance, node_word))
+            # triangle inequality: only subtrees at distance d with |d - distance| <= radius can hold matches
+            for child_distance, child in children.items():
+                if distance - radius <= child_distance <= distance + radius:
+                    nodes.append(child)
+        return found
+
+    def __len__(self):
+        return self.size
+
+
+def default_radius(name_part: str):
+    # short name parts must be near exact, otherwise almost every other short token is within reach
+    if len(name_part) <= 4:
+        return 1
+    return 2
+
+
+def compute_bktree_lookup_table(id_to_name, stop_words):
+    """
+        Computation of a BK-tree over all distinct normalized name parts, and a hashmap of name part to list of list-entries.
+        Alternative to the phonetic bins, it uses the same filtering of name parts.
+    """
+    token_to_id = {}
+    for reference, list_subject in id_to_name.items():
+        (aliases, birthdates) = list_subject
+        unique_name_parts = set(normalizer.normalize_aliases(aliases))
+        for name_part in unique_name_parts:
+            if len(name_part) < 2 or name_part in stop_words:
+                continue
+
+            if name_part not in token_to_id:
+                token_to_id[name_part] = []
+            token_to_id[name_part].append(reference)
+
+    tree = BKTree(token_to_id.keys())
+    return (tree, token_to_id)
+
+
+def find_bktree_candidates(name_parts, tree, token_to_id, radius=None):
+    """
+        Returns a dict of list-entry reference to the set of (query name part, list name part) pairs that are within the radius
+    """
+    candidates = {}
+    for name_part in name_parts:
+        name_part_radius = radius if radius is not None else default_radius(name_part)
+        for (distance, candidate_name_part) in tree.find(name_part, name_part_radius):
+            for reference in token_to_id[candidate_name_part]:
+                if reference not in candidates:
+                    candidates[reference] = set()
+                candidates[reference].add((name_part, candidate_name_part))
+    return candidates
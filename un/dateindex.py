@@ -0,0 +1,61 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+
+def parse_birthdate(birthdate):
+    """
+        Returns the date ordinal of a query birthdate, given as a date, a datetime or a 'YYYY-MM-DD' string. None if unknown.
+    """
+    if not birthdate:
+        return None
+    if isinstance(birthdate, str):
+        try:
+            return datetime.strptime(birthdate.strip(), '%Y-%m-%d').toordinal()
+        except ValueError:
+            return None  # not a full date, ignore it rather than excluding every list-entry
+    return birthdate.toordinal()
+
+
+class BirthdateIndex:
+    """
+        Sorted interval index over the birthdates of the list-entries, for finding the list-entries born on a given date.
+        Intervals are grouped by length (exact dates, years, longer ranges), and each group is sorted by start, so a lookup
+        only has to scan the intervals starting within the longest interval of the group before the date.
+    """
+
+    def __init__(self, id_to_name):
+        self.dated = set()  # list-entries with at least one known birthdate
+        group_intervals = {}
+        for reference, list_subject in id_to_name.items():
+            (aliases, birthdates) = list_subject
+            for birthdate in birthdates:
+                if birthdate is None:
+                    continue
+                self.dated.add(reference)
+                length = birthdate.end - birthdate.start
+                group = 0 if length == 0 else 366 if length <= 366 else None
+                if group not in group_intervals:
+                    group_intervals[group] = []
+                group_intervals[group].append((birthdate.start, birthdate.end, reference))
+
+        self.groups = []  # (longest interval, starts, ends, references), sorted by start
+        for group, intervals in group_intervals.items():
+            intervals.sort()
+            longest = max(end - start for (start, end, reference) in intervals)
+            self.groups.append((longest, [i[0] for i in intervals], [i[1] for i in intervals], [i[2] for i in intervals]))
+
+    def find(self, ordinal: int):
+        """
+            Returns the set of list-entries with a birthdate interval containing the date ordinal
+        """
+        found = set()
+        for (longest, starts, ends, references) in self.groups:
+            first = bisect_left(starts, ordinal - longest)
+            last = bisect_right(starts, ordinal)
+            for i in range(first, last):
+                if ends[i] >= ordinal:
+                    found.add(references[i])
+        return found
+
+    def __len__(self):
+        return sum(len(starts) for (longest, starts, ends, references) in self.groups)
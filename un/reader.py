@@ -3,11 +3,28 @@
 from timeit import default_timer as timer
 from dataobjects import NamePart
 from dataobjects import NameAlias
-
-import un_global as parser
+from dataobjects import BirthdateInterval
+from datetime import date
+
+
+def extract_birthdate(date_of_birth):
+    approximately = date_of_birth.TYPE_OF_DATE == 'APPROXIMATELY'
+    if date_of_birth.DATE:  # uses python's date object
+        if approximately:
+            return BirthdateInterval(date(date_of_birth.DATE.year - 1, 1, 1), date(date_of_birth.DATE.year + 1, 12, 31))
+        return BirthdateInterval(date_of_birth.DATE)
+    if date_of_birth.YEAR:
+        year = int(date_of_birth.YEAR)
+        if approximately:
+            return BirthdateInterval(date(year - 1, 1, 1), date(year + 1, 12, 31))
+        return BirthdateInterval(date(year, 1, 1), date(year, 12, 31))
+    if date_of_birth.FROM_YEAR and date_of_birth.TO_YEAR:
+        return BirthdateInterval(date(int(date_of_birth.FROM_YEAR), 1, 1), date(int(date_of_birth.TO_YEAR), 12, 31))
+    return None
 
 
 def load_sanctions(filename='consolidated.xml'):
+    import un_global as parser  # the generated parser is slow to import, only import it when a list file is parsed
     sanctions = parser.parse(filename, silence=True)
 
     entities = sanctions.ENTITIES.ENTITY
@@ -44,15 +61,16 @@ def load_sanctions(filename='consolidated.xml'):
         fixedRef = individual.REFERENCE_NUMBER.strip()
         name_aliases = set()
 
-        name_parts = [individual.FIRST_NAME, individual.SECOND_NAME, individual.THIRD_NAME, individual.FOURTH_NAME]
-        name_parts = [" ".join(name.split()) for name in name_parts if name]  # remove white-space and linebreaks
-        name_parts = [NamePart(p) for p in name_parts]
+        name_parts = [(individual.FIRST_NAME, True), (individual.SECOND_NAME, False), (individual.THIRD_NAME, False), (individual.FOURTH_NAME, False)]
+        name_parts = [(" ".join(name.split()), is_firstname) for (name, is_firstname) in name_parts if name]  # remove white-space and linebreaks
+        name_parts = [NamePart(p, is_firstname) for (p, is_firstname) in name_parts]
         name_aliases.add(NameAlias(name_parts))
 
-        date_aliases = set()
+        date_aliases = []
         for date_of_birth in individual.INDIVIDUAL_DATE_OF_BIRTH:
-            if (date_of_birth.DATE):
-                date_aliases.add(date_of_birth.DATE)  # uses python's datetime object
+            date_alias = extract_birthdate(date_of_birth)
+            if date_alias:
+                date_aliases.append(date_alias)
 
         for alias in individual.INDIVIDUAL_ALIAS:
             if alias.QUALITY == 'Low':
@@ -0,0 +1,204 @@
+import csv
+import heapq
+import io
+import json
+import os
+import sys
+import tempfile
+from timeit import default_timer as timer
+
+
+class RowFile:
+    """
+        The rows of a delimiter separated file with a header line, read one at a time as tuples of the given columns.
+        offset is the byte offset of the row after the last one read, seek(offset) makes the next read start there.
+    """
+
+    def __init__(self, filename, fields, delimiter=';'):
+        self.filename = filename
+        self.fields = fields
+        self.delimiter = delimiter
+        self.start_offset = None
+        self.offset = 0
+
+    def seek(self, offset):
+        self.start_offset = offset
+
+    def lines(self, row_file):
+        # the csv reader takes one line at a time, as many as a row needs, so offset stays at the end of the last row
+        for line in iter(row_file.readline, b''):
+            self.offset += len(line)
+            yield line.decode('utf-8')
+
+    def __iter__(self):
+        with io.open(self.filename, 'rb') as row_file:
+            self.offset = 0
+            csv_reader = csv.reader(self.lines(row_file), delimiter=self.delimiter)
+            try:
+                header = next(csv_reader, [])
+                missing_fields = [field for field in self.fields if field not in header]
+                if missing_fields:
+                    sys.exit('file {}: no column {}'.format(self.filename, ", ".join(missing_fields)))
+                columns = [header.index(field) for field in self.fields]
+                if self.start_offset is not None:
+                    row_file.seek(self.start_offset)
+                    self.offset = self.start_offset
+                for row in csv_reader:
+                    if row:
+                        yield tuple(row[column] if column < len(row) else None for column in columns)
+            except csv.Error as e:
+                sys.exit('file {}, line {}: {}'.format(self.filename, csv_reader.line_num, e))
+
+
+def read_chunks(rows, chunk_size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class ScreeningStats:
+    def __init__(self):
+        self.rows = 0
+        self.searches = 0
+        self.matched_rows = 0
+        self.matches = 0
+
+    def deduplication_rate(self):
+        return (self.rows - self.searches) / self.rows if self.rows else 0.0
+
+
+def screen_rows(rows, query_key, search_row, chunk_size=10000, stats=None):
+    """
+        Yields (row, matches) for each row, in input order. Rows are screened a chunk at a time, so memory use is bounded by
+        the chunk size and not by the input size. Rows with equal query keys within a chunk are searched for once.
+    """
+    if stats is None:
+        stats = ScreeningStats()
+    for chunk in read_chunks(rows, chunk_size):
+        keys = [query_key(row) for row in chunk]
+        key_to_matches = {}
+        for key, row in zip(keys, chunk):
+            if key not in key_to_matches:
+                key_to_matches[key] = search_row(row)
+                stats.searches += 1
+
+        for key, row in zip(keys, chunk):
+            matches = key_to_matches[key]
+            stats.rows += 1
+            if matches:
+                stats.matched_rows += 1
+                stats.matches += len(matches)
+            yield (row, matches)
+
+
+def checkpoint_filename(output_filename):
+    return output_filename + ".checkpoint"
+
+
+def load_checkpoint(output_filename):
+    """
+        Returns the checkpoint of an interrupted run writing to output_filename, or None if there is none
+    """
+    try:
+        with io.open(checkpoint_filename(output_filename), 'r', encoding='utf-8') as checkpoint_file:
+            return json.load(checkpoint_file)
+    except FileNotFoundError:
+        return None
+
+
+def save_checkpoint(output_filename, checkpoint):
+    # written aside and renamed, so a crash while saving leaves the previous checkpoint intact
+    filename = checkpoint_filename(output_filename)
+    with io.open(filename + ".tmp", 'w', encoding='utf-8') as checkpoint_file:
+        json.dump(checkpoint, checkpoint_file)
+    os.replace(filename + ".tmp", filename)
+
+
+def input_file_identity(filename):
+    status = os.stat(filename)
+    return {'filename': os.path.abspath(filename), 'size': status.st_size, 'mtime': status.st_mtime}
+
+
+def screen_file(rows, query_key, search_row, format_results, output_filename, chunk_size=10000, resume=False, stats=None, show_progress=True,
+                search_parameters=None, on_chunk=None):
+    """
+        Screens the rows of a RowFile and writes the lines given by format_results(row, matches) to output_filename.
+        After each chunk the output is flushed and a checkpoint is saved, with the number of input rows done, the offset of
+        the next input row, the output file length, and the input file and search_parameters (a dictionary, like the
+        similarity threshold) it is for. With resume, the output written after the last checkpoint is dropped and the input
+        is read on from its offset. A checkpoint for another or changed input file, or other search parameters, is refused.
+        on_chunk() is called after each checkpoint, e.g. to update metrics during long runs.
+        Returns the number of lines in the output file
+    """
+    if stats is None:
+        stats = ScreeningStats()
+    input_identity = input_file_identity(rows.filename)
+    search_parameters = json.loads(json.dumps(search_parameters or {}))  # as read back from the checkpoint
+    checkpoint = load_checkpoint(output_filename) if resume else None
+    if checkpoint is not None:
+        if checkpoint.get('input') != input_identity or checkpoint.get('search_parameters') != search_parameters:
+            sys.exit("Cannot resume from '{}', it is for another or changed input file or other search parameters. Remove it to start over".format(
+                checkpoint_filename(output_filename)))
+        stats.__dict__.update(checkpoint['stats'])
+        line_count = checkpoint['lines']
+        # output of the chunk that was in progress when the run was interrupted is screened again
+        os.truncate(output_filename, checkpoint['output_offset'])
+        rows.seek(checkpoint['input_offset'])
+        print("Resuming after {} rows, {} lines of output".format(stats.rows, line_count))
+    else:
+        line_count = 0
+
+    start = timer()
+    start_rows = stats.rows
+    with io.open(output_filename, 'ab' if checkpoint is not None else 'wb') as output_file:
+        for chunk in read_chunks(rows, chunk_size):
+            for (row, matches) in screen_rows(chunk, query_key, search_row, chunk_size, stats):
+                for line in format_results(row, matches):
+                    output_file.write((line + "\n").encode('utf-8'))
+                    line_count += 1
+            output_file.flush()
+            save_checkpoint(output_filename, {'input': input_identity, 'search_parameters': search_parameters, 'stats': vars(stats),
+                                              'input_offset': rows.offset, 'lines': line_count, 'output_offset': output_file.tell()})
+            if on_chunk is not None:
+                on_chunk()
+
+            if show_progress:
+                time_use_s = timer() - start
+                print("\rProgress: {} rows screened, {:.0f} rows/s".format(stats.rows, (stats.rows - start_rows) / time_use_s if time_use_s else 0),
+                      end="", flush=True)
+
+    os.remove(checkpoint_filename(output_filename))
+    return line_count
+
+
+def external_sort(filename, key, reverse=False, chunk_lines=100000):
+    """
+        Sorts the lines of a file in place, holding at most chunk_lines lines in memory. Sorted runs are written to
+        temporary files next to the input and merged.
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    run_filenames = []
+    try:
+        with io.open(filename, 'r', encoding='utf-8') as input_file:
+            for chunk in read_chunks(input_file, chunk_lines):
+                chunk.sort(key=key, reverse=reverse)
+                (handle, run_filename) = tempfile.mkstemp(suffix='.run', dir=directory)
+                with io.open(handle, 'w', encoding='utf-8') as run_file:
+                    run_file.writelines(chunk)
+                run_filenames.append(run_filename)
+
+        run_files = [io.open(run_filename, 'r', encoding='utf-8') for run_filename in run_filenames]
+        try:
+            with io.open(filename, 'w', encoding='utf-8') as output_file:
+                output_file.writelines(heapq.merge(*run_files, key=key, reverse=reverse))
+        finally:
+            for run_file in run_files:
+                run_file.close()
+    finally:
+        for run_filename in run_filenames:
+            os.remove(run_filename)